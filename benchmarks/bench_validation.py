@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compare the shard validation modes on one block-sized batch.
+
+    python benchmarks/bench_validation.py --txs 20000 --shards 8
+
+Prints transactions per second (wall clock) for each mode and the
+per-transaction cost measured from the hash kernel, which can be passed
+to sim-blockchain.py as --validation-cost.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.core.validation import VALIDATORS, CostModelValidator, make_validator
+
+
+def bench(validator, txs, shards):
+    batches = np.array_split(txs, shards)
+    start = time.perf_counter()
+    simulated = 0.0
+    for shard_id, batch in enumerate(batches):
+        _, t = validator.validate(shard_id, batch)
+        simulated = max(simulated, t)
+    return time.perf_counter() - start, simulated
+
+
+def main():
+    p = argparse.ArgumentParser(description="Shard validation benchmark")
+    p.add_argument("--txs", type=int, default=20000, help="Transactions in the batch")
+    p.add_argument("--shards", type=int, default=8, help="Shards the batch is split across")
+    args = p.parse_args()
+
+    txs = np.arange(args.txs, dtype=np.int64)
+    print(f"{'mode':<12} {'wall':>10} {'tx/s':>14} {'simulated':>10}")
+    for kind in VALIDATORS:
+        wall, simulated = bench(make_validator(kind), txs, args.shards)
+        rate = args.txs / wall if wall > 0 else float('inf')
+        print(f"{kind:<12} {wall:>9.3f}s {rate:>14,.0f} {simulated:>9.3f}s")
+
+    calibrated = CostModelValidator.calibrate()
+    print(f"\nhash-kernel cost per transaction: {calibrated.tx_cost:.3e}s (--validation-cost)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the simulator's hot paths.
+
+    python benchmarks/suite.py --out bench.json              # every case, every scale
+    python benchmarks/suite.py --quick --only mine,wallet    # smallest scales of two cases
+    python benchmarks/suite.py --out new.json --compare bench.json
+
+Every (case, params) pair runs in its own Python process so peak RSS is
+per case. A result records wall time, operations (and SimPy events, where
+the case drives an environment) per second and peak RSS; the JSON file
+also records the interpreter, library versions and git commit so two
+result files can be diffed with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import simpy
+
+CASES = {}
+
+
+def case(name, grid):
+    """Register a benchmark; grid is the list of params dicts it runs at."""
+    def register(fn):
+        CASES[name] = (fn, grid)
+        return fn
+    return register
+
+
+class CountingEnvironment(simpy.Environment):
+    """simpy.Environment that counts processed events."""
+
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.events = 0
+
+    def step(self):
+        self.events += 1
+        super().step()
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    rss = resource.getrusage(who).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+# Cases do their setup and return a callable; only the callable is timed. It
+# returns {'ops': ...} plus 'events' for cases that drive a SimPy environment.
+
+def _sim_argv(nodes, miners, blocks, danksharding=False):
+    argv = ['--nodes', str(nodes), '--neighbors', '8', '--miners', str(miners), '--hashrate', '1000000',
+            '--blocktime', '600', '--blocksize', '4096', '--difficulty', '6e8', '--blocks', str(blocks),
+            '--wallets', '100', '--transactions', '500', '--interval', '10', '--print', str(blocks)]
+    if danksharding:
+        argv += ['--danksharding', '--parallel-shards', '8', '--shard-executor', 'serial']
+    return argv
+
+
+@case('coord', [{'nodes': n, 'danksharding': d} for d in (False, True) for n in (100, 1000, 10000)])
+def bench_coord(nodes, danksharding):
+    """coord() end to end: mining, pool draining, gossip, reporting."""
+    import contextlib
+    import io
+    from simulation.cli.parser import parse_args
+    from simulation.runner import run_simulation
+
+    envs = []
+
+    def make_env(initial_time=0):
+        envs.append(CountingEnvironment(initial_time))
+        return envs[-1]
+
+    args = parse_args(_sim_argv(nodes, 10, 10, danksharding))
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = run_simulation(args, env_class=make_env)
+        return {'ops': summary['blocks'], 'events': envs[0].events}
+    return run
+
+
+@case('receive', [{'nodes': n} for n in (100, 1000, 10000)])
+def bench_receive(nodes):
+    """Node.receive fan-out: gossip five blocks over a k-out topology."""
+    from simulation.core import Node, Block
+    from simulation.network.topology import build_topology
+
+    env = CountingEnvironment()
+    net = [Node(env, i) for i in range(nodes)]
+    build_topology('k-out', nodes, 8).attach(net)
+
+    def run():
+        for b in range(1, 6):
+            env.process(net[b % nodes].receive(Block(b, 1000, 600.0), sender_node=None))
+        env.run()
+        return {'ops': 5 * nodes, 'events': env.events}
+    return run
+
+
+@case('mine', [{'miners': m, 'mining': k} for k in ('race', 'analytic') for m in (10, 100, 1000, 10000)])
+def bench_mine(miners, mining):
+    """Mining rounds: one Miner.mine process per miner, or one MiningPool draw."""
+    from simulation.core import Miner, MiningPool
+
+    env = CountingEnvironment()
+    ms = [Miner(i, 1e6) for i in range(miners)]
+    rounds = 20
+    d = 600 * miners * 1e6
+
+    def rounds_race():
+        for _ in range(rounds):
+            ev = env.event()
+            for m in ms:
+                env.process(m.mine(env, d, ev))
+            yield ev
+
+    def rounds_analytic():
+        pool = MiningPool(ms)
+        for _ in range(rounds):
+            yield from pool.mine(env, d)
+
+    def run():
+        env.process(rounds_race() if mining == 'race' else rounds_analytic())
+        env.run()
+        return {'ops': rounds, 'events': env.events}
+    return run
+
+
+@case('wallet', [{'wallets': w, 'arrivals': a} for a in ('wallet', 'aggregated') for w in (100, 1000, 10000)])
+def bench_wallet(wallets, arrivals):
+    """Transaction arrival generation: per-wallet processes or the aggregated generator."""
+    import simulation.globals as sim_globals
+    from simulation.core import Mempool
+    from simulation.core.wallet import wallet, WalletArrivals, wallet_arrivals
+
+    sim_globals.pool = Mempool()
+    env = CountingEnvironment()
+    count = 100
+
+    def run():
+        if arrivals == 'aggregated':
+            env.process(wallet_arrivals(env, WalletArrivals(wallets, count, 1.0), 600))
+        else:
+            for i in range(wallets):
+                env.process(wallet(env, i, count, 1.0))
+        env.run()
+        return {'ops': len(sim_globals.pool), 'events': env.events}
+    return run
+
+
+@case('latency', [{'calls': c, 'vectorized': v} for v in (False, True) for c in (10000, 100000, 1000000)])
+def bench_latency(calls, vectorized):
+    """calculate_network_latency per node pair, or sample_many over an array of edges."""
+    from simulation.network.latency import get_region_latency, calculate_network_latency
+
+    regions = get_region_latency()
+    n = len(regions.names)
+    src = np.random.default_rng(1).integers(0, n, calls)
+    dst = np.random.default_rng(2).integers(0, n, calls)
+
+    class _N:
+        __slots__ = ('region',)
+
+    def run():
+        if vectorized:
+            regions.sample_many(regions.base[src, dst])
+        else:
+            a, b = _N(), _N()
+            for i, j in zip(src.tolist(), dst.tolist()):
+                a.region, b.region = i, j
+                calculate_network_latency(a, b)
+        return {'ops': calls}
+    return run
+
+
+@case('topology', [{'kind': k, 'nodes': n} for k in ('k-out', 'regular', 'small-world', 'scale-free', 'geo')
+                   for n in (1000, 10000, 100000)])
+def bench_topology(kind, nodes):
+    """Topology construction."""
+    from simulation.network.topology import build_topology
+
+    regions = np.random.default_rng(1).integers(0, 20, nodes)
+
+    def run():
+        return {'ops': build_topology(kind, nodes, 8, regions=regions).num_edges}
+    return run
+
+
+@case('shards', [{'txs': t, 'validation': v} for v in ('legacy', 'hash-kernel', 'cost-model')
+                 for t in (1000, 10000, 100000) if not (v == 'legacy' and t > 10000)])
+def bench_shards(txs, validation):
+    """ParallelShardProcessor.parallel_block_processing on one block, serial executor."""
+    from simulation.core.parallel_shards import ParallelShardProcessor
+    from simulation.core.validation import make_validator
+
+    processor = ParallelShardProcessor(num_shards=8, validator=make_validator(validation))
+    block = np.arange(txs, dtype=np.int64)
+
+    def run():
+        return {'ops': processor.parallel_block_processing(block, txs)['total_processed']}
+    return run
+
+
+@case('cli', [{'script': s, 'nodes': n, 'danksharding': d}
+              for n in (100, 1000) for s in ('sim-blockchain2.py', 'sim-blockchain.py')
+              for d in ((False, True) if s == 'sim-blockchain.py' else (False,))])
+def bench_cli(script, nodes, danksharding):
+    """Whole program: the modular sim-blockchain.py against the legacy sim-blockchain2.py."""
+    argv = [sys.executable, os.path.join(ROOT, script)] + _sim_argv(nodes, 10, 10, danksharding)
+
+    def run():
+        subprocess.run(argv, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        return {'ops': 10, 'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN)}
+    return run
+
+
+def run_case(name, params):
+    """Child side: run one case and return its result row."""
+    random.seed(1)
+    fn, _ = CASES[name]
+    run = fn(**params)
+    start = time.perf_counter()
+    out = run()
+    wall = time.perf_counter() - start
+    row = {'case': name, 'params': params, 'wall': wall, 'ops': out['ops'],
+           'ops_per_sec': out['ops'] / wall if wall > 0 else None,
+           'events': out.get('events'),
+           'events_per_sec': out['events'] / wall if out.get('events') and wall > 0 else None,
+           'peak_rss_mb': out.get('peak_rss_mb', _peak_rss_mb())}
+    return row
+
+
+def _key(row):
+    return (row['case'], json.dumps(row['params'], sort_keys=True))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(new, old):
+    """Print wall-time ratios new/old for every case both files contain."""
+    before = {_key(r): r for r in old['results']}
+    print(f"\n{'case':<10} {'params':<55} {'old':>9} {'new':>9} {'ratio':>7}")
+    for r in new['results']:
+        o = before.get(_key(r))
+        if o is None:
+            continue
+        ratio = r['wall'] / o['wall'] if o['wall'] > 0 else float('inf')
+        flag = '  slower' if ratio > 1.2 else ''
+        print(f"{r['case']:<10} {_key(r)[1]:<55} {o['wall']:>8.3f}s {r['wall']:>8.3f}s {ratio:>6.2f}x{flag}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Simulator benchmark suite")
+    p.add_argument("--only", help="Comma-separated case names (default: all of " + ", ".join(CASES) + ")")
+    p.add_argument("--quick", action="store_true", help="Run only the smallest scale of each case variant")
+    p.add_argument("--out", help="Write results to this JSON file")
+    p.add_argument("--compare", help="Compare against an earlier results file")
+    p.add_argument("--case", help=argparse.SUPPRESS)
+    p.add_argument("--params", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    os.chdir(ROOT)  # chain configs are looked up relative to the repo root
+    if args.case:
+        print(json.dumps(run_case(args.case, json.loads(args.params))))
+        return 0
+
+    names = args.only.split(',') if args.only else list(CASES)
+    results = []
+    for name in names:
+        _, grid = CASES[name]
+        if args.quick:
+            # Smallest scale: the first params dict of each variant
+            seen, quick = set(), []
+            for params in grid:
+                variant = json.dumps({k: v for k, v in params.items() if isinstance(v, (str, bool))}, sort_keys=True)
+                if variant not in seen:
+                    seen.add(variant)
+                    quick.append(params)
+            grid = quick
+        for params in grid:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--case', name,
+                                   '--params', json.dumps(params)], capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{name} {params}: FAILED\n{proc.stderr.strip()}")
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(row)
+            eps = f" {row['events_per_sec']:,.0f} ev/s" if row['events_per_sec'] else ''
+            print(f"{name:<10} {json.dumps(params):<55} {row['wall']:8.3f}s {row['ops_per_sec']:>14,.0f} op/s"
+                  f"{eps} {row['peak_rss_mb']:.0f} MB")
+
+    report = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'simpy': getattr(simpy, '__version__', None),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 import json
 import os
+from functools import lru_cache
 
+# Cached: many runs in one process share the parsed config (callers must not modify it)
+@lru_cache(maxsize=None)
 def load_json(name):
     # First try the chain-specific directory
     chain_path = os.path.join("config", "chains", f"{name}.json")
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulation.sweep import load_spec, run_sweep
+
+
+def main():
+    p = argparse.ArgumentParser(description="Run a parameter sweep in parallel")
+    p.add_argument("spec", help="JSON sweep spec (see simulation/sweep.py)")
+    p.add_argument("--out", default="sweep_results.csv", help="Result table (CSV)")
+    p.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    p.add_argument("--no-resume", action="store_true", help="Discard previous progress and start over")
+    args = p.parse_args()
+
+    run_sweep(load_spec(args.spec), args.out, workers=args.workers, resume=not args.no_resume)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        exit(main())
+    except KeyboardInterrupt:
+        print("Sweep interrupted by user")
+        sys.exit(130)
@@ -2,5 +2,6 @@ from . import globals
 from .coordinator import coord
 from . import core
 from . import utils
+from .simulation import Simulation, SimulationResult
 
-__all__ = ['globals', 'coord', 'core', 'utils']
+__all__ = ['globals', 'coord', 'core', 'utils', 'Simulation', 'SimulationResult']
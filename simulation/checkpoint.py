@@ -0,0 +1,270 @@
+"""
+Checkpoint and resume at block boundaries.
+
+A checkpoint is one compressed .npz file (no pickles) holding every piece
+of state the rest of a run depends on:
+
+    pool           pending transaction ids and arrival times
+    globals        sim_globals counters and Danksharding totals
+    coord          block count, difficulty/retarget and halving state,
+                   print-interval bookkeeping, propagation sums
+    nodes          region, bandwidth and seen-block sets of every node
+    topology       the CSR neighbor arrays
+    generators     wallet progress (per-wallet or aggregated)
+    rng            Python `random` state and the latency generator
+    metrics        the time series sampled so far
+    relay          relay byte and propagation totals, and blocks still open
+    pending        the block handed to gossip but not yet delivered
+
+In-flight gossip of older blocks is not saved: coord() checkpoints right
+after handing a block to its first node, so with block intervals far
+longer than propagation time nothing else is on the wire. Checkpoints are
+written as checkpoint-<block>.npz into a directory, atomically, keeping the
+last few. A run resumed from a checkpoint continues with the same random
+draws; because only structural options must match, a warm-up checkpoint
+can be branched into several scenarios (different Danksharding settings,
+block limits, propagation models, ...).
+"""
+import glob
+import json
+import os
+import random
+import numpy as np
+
+import simulation.globals as sim_globals
+from .network.latency import get_region_latency
+
+FORMAT_VERSION = 1
+
+# Options that must match between the checkpointed run and the resumed one
+STRUCTURAL_ARGS = ('nodes', 'node_table', 'miners', 'wallets', 'transactions', 'interval', 'arrivals')
+
+GLOBALS = ('network_data', 'io_requests', 'total_tx', 'total_coins',
+           'total_blobs_processed', 'total_blob_data', 'parallel_speedup')
+
+
+def _json_array(obj):
+    return np.frombuffer(json.dumps(obj, default=lambda v: v.item()).encode(), dtype=np.uint8)
+
+
+def _seen_arrays(nodes):
+    # NodeTable already stores seen-sets as arrays; Node objects keep one SeenBlocks each
+    seen = getattr(nodes, 'seen', None)
+    if seen is not None:
+        return seen.watermark, seen.words, None
+    window = nodes[0].blocks.window if len(nodes) else 0
+    nbytes = -(-window // 64) * 8
+    watermark = np.fromiter((n.blocks.watermark for n in nodes), dtype=np.int64, count=len(nodes))
+    count = np.fromiter((n.blocks.count for n in nodes), dtype=np.int64, count=len(nodes))
+    raw = b''.join(n.blocks.bits.to_bytes(nbytes, 'little') for n in nodes)
+    words = np.frombuffer(raw, dtype=np.uint64).reshape(len(nodes), nbytes // 8)
+    return watermark, words, count
+
+
+class Checkpointer:
+    """Writes a checkpoint every `every` blocks into `directory`, keeping the last `keep`."""
+
+    def __init__(self, directory, every, args, nodes, topology, arrivals=None, metrics=None,
+                 processor=None, keep=3):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.every = every
+        self.args = {k: getattr(args, k, None) for k in STRUCTURAL_ARGS}
+        self.nodes = nodes
+        self.topology = topology
+        self.arrivals = arrivals
+        self.metrics = metrics
+        self.processor = processor
+        self.keep = keep
+
+    def due(self, block):
+        return self.every > 0 and block % self.every == 0
+
+    def save(self, env, coord_state, pending=None):
+        """Snapshot everything at the current block boundary; returns the file written."""
+        pool = sim_globals.pool
+        wids, times = pool.peek(len(pool))
+        version, internal, gauss = random.getstate()
+        latency = get_region_latency().get_state()
+        watermark, words, count = _seen_arrays(self.nodes)
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'time': env.now,
+            'block': coord_state['bc'],
+            'args': self.args,
+            'coord': coord_state,
+            'pending': pending,
+            'globals': {k: getattr(sim_globals, k) for k in GLOBALS},
+            'pool_dropped': pool.dropped,
+            'random': [version, gauss],
+            'latency_rng': latency['rng'],
+            'latency_pos': latency['pos'],
+            'arrivals': None,
+            'metrics': None,
+            'shards': None,
+            'relay': sim_globals.relay_stats.get_state() if sim_globals.relay_stats is not None else None,
+        }
+        arrays = {
+            'pool_wids': np.array(wids, dtype=np.int64),
+            'pool_times': np.array(times, dtype=np.float64),
+            'random_state': np.array(internal, dtype=np.uint32),
+            'indptr': self.topology.indptr,
+            'indices': self.topology.indices,
+            'seen_watermark': watermark,
+            'seen_words': words,
+        }
+        if count is not None:
+            arrays['seen_count'] = count
+        if 'jitter' in latency:
+            arrays['latency_jitter'] = latency['jitter']
+            arrays['latency_congestion'] = latency['congestion']
+
+        if getattr(self.nodes, 'seen', None) is not None:
+            arrays['node_region'] = self.nodes.region
+            arrays['node_bandwidth'] = self.nodes.bandwidth_mbps
+        else:
+            arrays['node_region'] = np.fromiter((n.region for n in self.nodes), dtype=np.int16, count=len(self.nodes))
+            arrays['node_bandwidth'] = np.fromiter((n.bandwidth_mbps for n in self.nodes), dtype=np.float64,
+                                                   count=len(self.nodes))
+
+        if self.arrivals is not None:
+            meta['arrivals'] = {'emitted': self.arrivals.emitted, 'next_wake': self.arrivals.next_wake}
+
+        if self.metrics is not None and self.metrics.size:
+            m = self.metrics
+            meta['metrics'] = {'size': m.size, 'columns': m.columns}
+            arrays['metrics_times'] = m.times[:m.size]
+            arrays['metrics_values'] = m.values[:m.size]
+            for h in m.metrics:
+                if hasattr(h, 'counts'):
+                    h.flush()
+                    arrays[f"hist_{h.name}"] = h.counts
+
+        if self.processor is not None:
+            p = self.processor
+            meta['shards'] = {'shard_times': {str(k): v for k, v in p.shard_times.items()},
+                              'busy_time': p.busy_time, 'wall_time': p.wall_time,
+                              'simulated_busy': p.simulated_busy, 'simulated_wall': p.simulated_wall}
+
+        arrays['meta'] = _json_array(meta)
+        path = os.path.join(self.directory, f"checkpoint-{coord_state['bc']:09d}.npz")
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+        for old in sorted(glob.glob(os.path.join(self.directory, 'checkpoint-*.npz')))[:-self.keep]:
+            os.remove(old)
+        return path
+
+
+def latest_checkpoint(path):
+    """path itself if it is a file, else the newest checkpoint in the directory."""
+    if os.path.isfile(path):
+        return path
+    files = sorted(glob.glob(os.path.join(path, 'checkpoint-*.npz')))
+    if not files:
+        raise FileNotFoundError(f"No checkpoint found in '{path}'")
+    return files[-1]
+
+
+class Checkpoint:
+    """A loaded checkpoint; restore_* methods put its state back in place."""
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(path, allow_pickle=False) as data:
+            self.arrays = {k: data[k] for k in data.files}
+        self.meta = json.loads(self.arrays.pop('meta').tobytes().decode())
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {self.meta['version']} in '{path}'")
+        self.time = self.meta['time']
+        self.block = self.meta['block']
+        self.coord = self.meta['coord']
+        self.pending = self.meta['pending']
+        self.arrivals = self.meta['arrivals']
+
+    def check_args(self, args):
+        for k in STRUCTURAL_ARGS:
+            saved = self.meta['args'].get(k)
+            if getattr(args, k, None) != saved:
+                raise ValueError(f"Cannot resume '{self.path}': --{k.replace('_', '-')} was {saved}, "
+                                 f"now {getattr(args, k, None)}")
+
+    @property
+    def regions(self):
+        return self.arrays['node_region']
+
+    @property
+    def bandwidth_mbps(self):
+        return self.arrays['node_bandwidth']
+
+    @property
+    def indptr(self):
+        return self.arrays['indptr']
+
+    @property
+    def indices(self):
+        return self.arrays['indices']
+
+    def restore_globals(self, pool):
+        for k, v in self.meta['globals'].items():
+            setattr(sim_globals, k, v)
+        pool.extend(self.arrays['pool_wids'], self.arrays['pool_times'])
+        pool.dropped = self.meta['pool_dropped']
+        sim_globals.pool = pool
+
+    def restore_relay(self, stats):
+        saved = self.meta.get('relay')
+        if saved is not None:
+            stats.set_state(saved)
+
+    def restore_seen(self, nodes):
+        watermark, words = self.arrays['seen_watermark'], self.arrays['seen_words']
+        seen = getattr(nodes, 'seen', None)
+        if seen is not None:
+            seen.watermark[:] = watermark
+            seen.words[:] = words
+            return
+        count = self.arrays['seen_count']
+        raw = words.tobytes()
+        width = words.shape[1] * 8
+        for i, node in enumerate(nodes):
+            node.blocks.watermark = int(watermark[i])
+            node.blocks.bits = int.from_bytes(raw[i * width:(i + 1) * width], 'little')
+            node.blocks.count = int(count[i])
+
+    def restore_metrics(self, metrics):
+        saved = self.meta['metrics']
+        if saved is None:
+            return
+        if saved['columns'] != metrics.columns:
+            raise ValueError(f"Cannot resume '{self.path}': metric columns differ")
+        for h in metrics.metrics:
+            key = f"hist_{h.name}"
+            if key in self.arrays:
+                h.counts[:] = self.arrays[key]
+        for t, row in zip(self.arrays['metrics_times'], self.arrays['metrics_values']):
+            metrics.sample_row(t, row)
+
+    def restore_processor(self, processor):
+        saved = self.meta['shards']
+        if saved is None:
+            return
+        processor.shard_times = {int(k): v for k, v in saved['shard_times'].items()}
+        for k in ('busy_time', 'wall_time', 'simulated_busy', 'simulated_wall'):
+            setattr(processor, k, saved[k])
+
+    def restore_rng(self):
+        """Restore the random generators; call this last, after everything else is built."""
+        version, gauss = self.meta['random']
+        random.setstate((version, tuple(int(x) for x in self.arrays['random_state']), gauss))
+        state = {'rng': self.meta['latency_rng'], 'pos': self.meta['latency_pos']}
+        if 'latency_jitter' in self.arrays:
+            state['jitter'] = self.arrays['latency_jitter']
+            state['congestion'] = self.arrays['latency_congestion']
+        get_region_latency().set_state(state)
+
+
+def load_checkpoint(path):
+    return Checkpoint(latest_checkpoint(path))
@@ -2,7 +2,7 @@ import argparse
 from config.loader import get_defaults
 import simulation.utils.block_check as block_check
 
-def parse_args():
+def parse_args(argv=None):
     p = argparse.ArgumentParser()
     p.add_argument("--nodes", type=int)
     p.add_argument("--neighbors", type=int)
@@ -22,14 +22,60 @@ def parse_args():
     p.add_argument("--halving", dest="halving_interval", type=int, default=210000)
     p.add_argument("--chain", type=str)
     p.add_argument("--workload", type=str)
+    p.add_argument("--topology", choices=["k-out", "regular", "small-world", "scale-free", "geo"], default="k-out",
+                   help="Peer graph generator (k-out is the original random neighbors)")
+    p.add_argument("--node-table", action="store_true",
+                   help="Store nodes as NumPy arrays (NodeTable) instead of one Node object per peer")
+    p.add_argument("--mining", choices=["race", "analytic"], default="race",
+                   help="Mining engine: one process per miner, or one draw per block from the total hashrate")
+    p.add_argument("--propagation", choices=["gossip", "shortest-path", "pdes"], default="gossip",
+                   help="Block propagation: simulate every message, compute arrival times with one Dijkstra pass, "
+                        "or simulate every message in --partitions worker processes")
+    p.add_argument("--relay", choices=["push", "inv", "compact"], default="push",
+                   help="Block relay protocol of gossip: full block to every neighbor, announce/request, "
+                        "or compact blocks rebuilt from the mempool")
+    p.add_argument("--uplink", choices=["ideal", "shared"], default="ideal",
+                   help="Uplink model of gossip: every transfer as if the link were idle, or concurrent sends "
+                        "sharing the node's bandwidth")
+    p.add_argument("--partitions", type=int,
+                   help="Worker processes for --propagation pdes, nodes split by region (default: CPU count)")
+    p.add_argument("--mempool", choices=["fifo", "fee"], default="fifo",
+                   help="Block assembly: oldest transactions first, or highest fee rate first with a byte cap")
+    p.add_argument("--mempool-max", type=int,
+                   help="Cap on pending transactions of the FIFO mempool; arrivals beyond it are dropped (default: none)")
+    p.add_argument("--mempool-mb", type=float, default=300,
+                   help="Mempool size cap in MB of transaction vsize for --mempool fee (default: 300)")
+    p.add_argument("--arrivals", choices=["wallet", "aggregated"], default="wallet",
+                   help="Transaction generator: one process per wallet, or one aggregated vectorized process")
+    p.add_argument("--checkpoint-dir", help="Write checkpoints at block boundaries into this directory")
+    p.add_argument("--checkpoint-every", type=int, default=2016, help="Blocks between checkpoints (default: 2016)")
+    p.add_argument("--resume", help="Continue from a checkpoint file, or the latest one in a directory")
+    p.add_argument("--profile", action="store_true",
+                   help="Count events and wall time per originating process and print a profile at the end")
+    p.add_argument("--profile-out", help="Also write cProfile stats of the run to this file")
+    p.add_argument("--trace", help="Record block creation and per-node arrival times to this trace directory")
+    p.add_argument("--shards", type=int, default=0,
+                   help="Run this many independent shard chains, one worker process each, synchronized at beacon blocks")
+    p.add_argument("--beacon-interval", type=float, help="Seconds between beacon blocks with --shards (default: --blocktime)")
+    p.add_argument("--cross-shard", type=float, default=0.1,
+                   help="Fraction of transactions that send a receipt to another shard with --shards (default: 0.1)")
+    p.add_argument("--fast-forward", action="store_true",
+                   help="Transaction-free runs only: draw block times in NumPy chunks instead of simulating the network")
+    p.add_argument("--metrics-out", help="Write the metrics time series to this file (.csv, .json or .parquet)")
     
     # Danksharding arguments
     p.add_argument("--danksharding", action="store_true", help="Enable Danksharding optimization")
     p.add_argument("--parallel-shards", type=int, default=1, help="Number of parallel shards for Danksharding")
     p.add_argument("--max-blobs", type=int, default=6, help="Maximum blobs per block")
+    p.add_argument("--shard-executor", choices=["serial", "process"], default="process",
+                   help="Run shard batches serially or on a persistent process pool")
+    p.add_argument("--shard-workers", type=int, help="Worker processes for shard batches (default: min(shards, cores))")
+    p.add_argument("--validation", choices=["legacy", "hash-kernel", "cost-model"], default="legacy",
+                   help="Shard validation: legacy Python loop, batched SHA-256 kernel, or a cost model that charges simulated time")
+    p.add_argument("--validation-cost", type=float, help="Seconds of simulated time per transaction for --validation cost-model (default: 50e-6)")
     p.add_argument("--tx-optimization", type=float, default=0.5, help="Transaction optimization level (0.0-1.0)")
     
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     merged = get_defaults(args)
     args.__dict__.update(merged)
@@ -50,4 +96,53 @@ def parse_args():
             print(f"Limiting blocks to {est_blocks} (workload-based) instead of {args.blocks_limit} (time-based)")
             args.blocks_limit = est_blocks
 
+    if args.fast_forward:
+        if args.transactions > 0:
+            p.error("--fast-forward needs --transactions 0")
+        if args.blocks_limit is None:
+            p.error("--fast-forward needs --blocks or --years")
+        for flag in ("danksharding", "resume", "checkpoint_dir", "trace", "profile"):
+            if getattr(args, flag):
+                p.error(f"--fast-forward cannot be combined with --{flag.replace('_', '-')}")
+
+    if args.propagation == "pdes":
+        for flag in ("resume", "checkpoint_dir"):
+            if getattr(args, flag):
+                p.error(f"--propagation pdes cannot be combined with --{flag.replace('_', '-')}")
+
+    if args.relay != "push":
+        if args.propagation != "gossip":
+            p.error(f"--relay {args.relay} needs --propagation gossip")
+        for flag in ("resume", "checkpoint_dir"):
+            if getattr(args, flag):
+                p.error(f"--relay {args.relay} cannot be combined with --{flag.replace('_', '-')}")
+
+    if args.mempool_max is not None:
+        if args.mempool_max <= 0:
+            p.error("--mempool-max must be positive")
+        if args.mempool == "fee":
+            p.error("--mempool-max caps the FIFO mempool; use --mempool-mb with --mempool fee")
+
+    if args.mempool == "fee":
+        if args.mempool_mb <= 0:
+            p.error("--mempool-mb must be positive")
+        for flag in ("resume", "checkpoint_dir"):
+            if getattr(args, flag):
+                p.error(f"--mempool fee cannot be combined with --{flag.replace('_', '-')}")
+
+    if args.uplink == "shared":
+        if args.propagation != "gossip":
+            p.error("--uplink shared needs --propagation gossip")
+        for flag in ("resume", "checkpoint_dir"):
+            if getattr(args, flag):
+                p.error(f"--uplink shared cannot be combined with --{flag.replace('_', '-')}")
+
+    if args.shards > 1:
+        for name in ("nodes", "miners") + (("wallets",) if args.transactions > 0 else ()):
+            if (getattr(args, name) or 0) < args.shards:
+                p.error(f"--shards {args.shards} needs at least one of --{name} per shard")
+        for flag in ("fast_forward", "resume", "checkpoint_dir", "trace", "profile"):
+            if getattr(args, flag):
+                p.error(f"--shards cannot be combined with --{flag.replace('_', '-')}")
+
     return args
@@ -1,7 +1,11 @@
 import random
 import time
+import numpy as np
 import simulation.globals as sim_globals
 from .core.block import Block
+from .core.miner import MiningPool
+from .network.propagation import propagate_block, propagation_stats
+from .metrics import MetricsRegistry
 from .utils.formatter import human
 
 # Import parallel processing for Danksharding
@@ -12,14 +16,90 @@ except ImportError:
     PARALLEL_AVAILABLE = False
 
 
+def _broadcast_after(env, node, b, delay):
+    # Broadcast once the block has been validated
+    yield env.timeout(delay)
+    yield env.process(node.receive(b, sender_node=None))
+
+
+def _restore_block(p):
+    from .core.blobs import Blob, VirtualBlobData
+    blobs = [Blob(f"txdata_{p['id']}_{i}", VirtualBlobData(size)) for i, size in enumerate(p['blobs'])]
+    return Block(p['id'], p['txs'], p['dt'], blobs=blobs, optimized_txs=p['optimized_txs'])
+
+
+def register_metrics(metrics, th, propagation="gossip"):
+    # The series every engine records; counters and some gauges read the globals
+    m_blocks = metrics.counter('blocks')
+    metrics.counter('total_tx', lambda: sim_globals.total_tx)
+    metrics.gauge('total_coins', lambda: sim_globals.total_coins)
+    metrics.gauge('pool', lambda: len(sim_globals.pool))
+    metrics.counter('network_data', lambda: sim_globals.network_data)
+    metrics.counter('io_requests', lambda: sim_globals.io_requests)
+    metrics.counter('blobs', lambda: sim_globals.total_blobs_processed)
+    metrics.counter('blob_data', lambda: sim_globals.total_blob_data)
+    m_diff = metrics.gauge('difficulty')
+    m_hashrate = metrics.gauge('hashrate')
+    m_abt = metrics.gauge('abt')
+    m_tps = metrics.gauge('tps')
+    m_infl = metrics.gauge('inflation')
+    h_interval = metrics.histogram('block_interval', np.geomspace(1e-2, 1e5, 71))
+    h_prop = metrics.histogram('propagation_delay', np.geomspace(1e-4, 1e3, 71)) if propagation == "shortest-path" else None
+    m_hashrate.set(th)
+    return m_blocks, m_diff, m_abt, m_tps, m_infl, h_interval, h_prop
+
+
+def print_sum(now, bc, blocks_limit, diff, th, row):
+    pct = (bc / blocks_limit) * 100 if blocks_limit else 0
+    eta = (blocks_limit - bc) * row['abt'] if blocks_limit else 0
+    print(f"[{now:.2f}] Sum B:{bc}/{blocks_limit} {pct:.1f}% abt:{row['abt']:.2f}s "
+        f"tps:{row['tps']:.2f} infl:{row['inflation']:.2f}% ETA:{eta:.2f}s "
+        f"Diff:{human(diff)} H:{human(th)} Tx:{int(row['total_tx'])} "
+        f"C:{human(row['total_coins'])} Pool:{int(row['pool'])} "
+        f"NMB:{row['network_data']/1e6:.2f} IO:{int(row['io_requests'])}")
+
+
+def finish_run(now, bc, blocks_limit, diff, th, row):
+    # End-of-run report and summary dict from the last metrics row
+    simulation_time = time.time() - sim_globals.start_time
+    progress = f"B:{bc}/{blocks_limit} 100.0%" if blocks_limit else f"B:{bc}"
+    print(f"[******] End {progress} abt:{row['abt']:.2f}s tps:{row['tps']:.2f} "
+        f"infl:{row['inflation']:.2f}% Diff:{human(diff)} H:{human(th)} "
+        f"Tx:{int(row['total_tx'])} C:{human(row['total_coins'])} Pool:{int(row['pool'])} "
+        f"NMB:{row['network_data']/1e6:.2f} IO:{int(row['io_requests'])}")
+    print(f"\nSimulation completed in {simulation_time:.2f} seconds")
+    print(f"Simulated blockchain time: {now:.2f} seconds")
+    return {
+        'blocks': bc,
+        'blocks_limit': blocks_limit,
+        'sim_time': row['time'],
+        'abt': row['abt'],
+        'tps': row['tps'],
+        'inflation': row['inflation'],
+        'difficulty': row['difficulty'],
+        'hashrate': row['hashrate'],
+        'total_tx': int(row['total_tx']),
+        'total_coins': row['total_coins'],
+        'pool': int(row['pool']),
+        'network_data': int(row['network_data']),
+        'io_requests': int(row['io_requests']),
+        'wall_time': simulation_time,
+    }
+
+
 def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
-          wallets, tx_per_wallet, init_reward, halving_interval):
+          wallets, tx_per_wallet, init_reward, halving_interval, arrivals=None,
+          mining="race", propagation="gossip", metrics=None, processor=None, checkpoint=None, resume=None,
+          gossip=None, on_block=None):
     bc = lt = la = ba = 0
     last_t = last_b = last_tx = last_coins = 0
     last_infl = 0 
 
     diff = diff0 if diff0 is not None else bt * sum(m.h for m in miners)
     th = sum(m.h for m in miners)
+    mining_pool = MiningPool(miners) if mining == "analytic" else None
+    if processor is None and PARALLEL_AVAILABLE:
+        processor = parallel_processor
     
     initial_coins = sim_globals.total_coins
 
@@ -31,6 +111,33 @@ def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
     total_needed = wallets * tx_per_wallet if has_tx else None
     pool_processed = 0
 
+    # Shortest-path propagation statistics (sums over blocks)
+    prop_blocks = 0
+    prop_median = prop_p90 = prop_full = prop_coverage = 0.0
+
+    # Time series sampled every print_int blocks; counters read the globals
+    if metrics is None:
+        metrics = MetricsRegistry(capacity=blocks_limit // print_int + 2 if blocks_limit else 1024)
+    m_blocks, m_diff, m_abt, m_tps, m_infl, h_interval, h_prop = register_metrics(metrics, th, propagation)
+
+    if resume is not None:
+        # Continue from a checkpoint taken at a block boundary
+        st = resume.coord
+        bc, lt, la, ba = st['bc'], st['lt'], st['la'], st['ba']
+        last_t, last_b, last_tx, last_coins, last_infl = (st['last_t'], st['last_b'], st['last_tx'],
+                                                          st['last_coins'], st['last_infl'])
+        diff, reward, halvings, pool_processed = st['diff'], st['reward'], st['halvings'], st['pool_processed']
+        prop_blocks, prop_median, prop_p90, prop_full, prop_coverage = st['prop']
+        resume.restore_metrics(metrics)
+        if resume.pending is not None:
+            # The last block was handed to gossip just before the checkpoint
+            p = resume.pending
+            b = _restore_block(p)
+            if p['delay'] > 0:
+                env.process(_broadcast_after(env, nodes[p['source']], b, p['delay']))
+            else:
+                env.process(nodes[p['source']].receive(b, sender_node=None))
+
     try:
         while True:
             if blocks_limit is not None and bc >= blocks_limit:
@@ -52,52 +159,52 @@ def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
                         f"infl:N/A NMB:{sim_globals.network_data/1e6:.2f} IO:{sim_globals.io_requests}")
 
             # Mining round
-            ev = env.event()
-            for m in miners:
-                env.process(m.mine(env, diff, ev))
-            winner = yield ev
+            if mining_pool is not None:
+                winner = yield from mining_pool.mine(env, diff)
+            else:
+                ev = env.event()
+                for m in miners:
+                    env.process(m.mine(env, diff, ev))
+                winner = yield ev
 
             # New block
             dt = env.now - lt
             lt = env.now
             bc += 1
             ba += 1
+            h_interval.observe(dt)
 
+            validation_delay = 0.0
             if has_tx:
+                if arrivals is not None:
+                    # Aggregated wallet generator: bring the pool up to date
+                    arrivals.advance(env.now)
                 avail = len(sim_globals.pool)
                 take = min(avail, blk_sz)
+                if sim_globals.relay == "compact":
+                    # Arrival times of the included transactions, to tell which ones peers still miss
+                    tx_times = np.array(sim_globals.pool.peek(take)[1])
                 
                 # Danksharding PARALLEL optimization: Process transactions across shards
                 if sim_globals.danksharding_enabled and PARALLEL_AVAILABLE and take > 10:
                     # Use parallel shard processing for any meaningful transaction set
-                    parallel_result = parallel_processor.parallel_block_processing(
-                        sim_globals.pool[:take], 
+                    wids, _ = sim_globals.pool.peek(take)
+                    parallel_result = processor.parallel_block_processing(
+                        wids,
                         take,
-                        num_workers=min(8, parallel_processor.num_shards)  # Use configured shards
+                        num_workers=min(8, processor.num_shards)  # Use configured shards
                     )
-                    
-                    # Remove processed transactions efficiently
-                    del sim_globals.pool[:parallel_result.get('total_processed', take)]
-                    pool_processed += parallel_result.get('total_processed', take)
-                    
+
+                    # Remove processed transactions from the head of the pool
+                    pool_processed += sim_globals.pool.discard(parallel_result.get('total_processed', take))
+
                     # Record parallel processing speedup
                     if 'parallel_speedup' in parallel_result:
                         sim_globals.parallel_speedup = parallel_result['parallel_speedup']
-                
-                elif sim_globals.danksharding_enabled:
-                    # Small batch optimization for small transaction sets
-                    if take > 0:
-                        batch_size = min(take, 1000)
-                        if batch_size > 0:
-                            for _ in range(0, take, batch_size):
-                                batch_take = min(batch_size, take - _)
-                                del sim_globals.pool[:batch_take]
-                        pool_processed += take
+                    # Simulated validation cost (cost-model validator) delays the broadcast
+                    validation_delay = parallel_result.get('simulated_time', 0.0)
                 else:
-                    # Original slow processing
-                    pool_processed += take
-                    for _ in range(take):
-                        sim_globals.pool.pop(0)
+                    pool_processed += sim_globals.pool.discard(take)
                 
                 txs = take + 1
             else:
@@ -128,6 +235,12 @@ def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
                             blobs.append(blob)
             
             b = Block(bc, txs, dt, blobs=blobs, optimized_txs=optimized_txs)
+            if has_tx and sim_globals.relay == "compact":
+                b.tx_times = tx_times
+            if sim_globals.trace is not None:
+                sim_globals.trace.block(b.id, winner.id, env.now, b.size, txs, len(blobs))
+            if on_block is not None:
+                on_block(b.id, winner.id, env.now, b.size, txs, len(blobs))
             
             sim_globals.total_tx += txs
 
@@ -138,7 +251,28 @@ def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
                 halvings += 1
                 reward = reward / 2 if halvings < max_halvings else 0
 
-            env.process(random.choice(nodes).receive(b, sender_node=None))
+            if propagation == "shortest-path":
+                arrival, _ = propagate_block(nodes, random.choice(nodes), b, start_time=env.now + validation_delay)
+                stats = propagation_stats(arrival, env.now)
+                reached = np.isfinite(arrival)
+                h_prop.observe_many(arrival[reached] - env.now)
+                if sim_globals.trace is not None:
+                    sim_globals.trace.arrivals_many(b.id, np.flatnonzero(reached), arrival[reached])
+                prop_blocks += 1
+                prop_median += stats['median']
+                prop_p90 += stats['p90']
+                prop_full = max(prop_full, stats['full'])
+                prop_coverage += stats['coverage']
+            else:
+                source = random.choice(nodes)
+                if gossip is not None:
+                    # Partitioned gossip (PDES): catch up to now, then hand the block over
+                    gossip.advance(env.now)
+                    gossip.inject(b, source.id, env.now + validation_delay)
+                elif validation_delay > 0:
+                    env.process(_broadcast_after(env, source, b, validation_delay))
+                else:
+                    env.process(source.receive(b, sender_node=None))
 
             # Logging / summary
             if dbg:
@@ -146,41 +280,53 @@ def coord(env, nodes, miners, bt, diff0, blocks_limit, blk_sz, print_int, dbg,
                     f"Diff:{human(diff)} H:{human(th)} Tx:{sim_globals.total_tx} "
                     f"C:{human(sim_globals.total_coins)} Pool:{len(sim_globals.pool)} "
                     f"infl:N/A NMB:{sim_globals.network_data/1e6:.2f} IO:{sim_globals.io_requests}")
-            elif bc % print_int == 0:
-                pct = (bc / blocks_limit) * 100 if blocks_limit else 0
+            if bc % print_int == 0:
                 ti = env.now - last_t
                 dtx = sim_globals.total_tx - last_tx
                 dcoins = sim_globals.total_coins - last_coins
-                abt = ti / (bc - last_b) if bc - last_b else 0
-                tps = dtx / ti if ti > 0 else 0
-                infl = (dcoins / last_coins) * (sim_globals.YEAR / ti) * 100 if last_coins > 0 else 0
-                eta = (blocks_limit - bc) * abt if blocks_limit else 0
-                print(f"[{env.now:.2f}] Sum B:{bc}/{blocks_limit} {pct:.1f}% abt:{abt:.2f}s "
-                    f"tps:{tps:.2f} infl:{infl:.2f}% ETA:{eta:.2f}s "
-                    f"Diff:{human(diff)} H:{human(th)} Tx:{sim_globals.total_tx} "
-                    f"C:{human(sim_globals.total_coins)} Pool:{len(sim_globals.pool)} "
-                    f"NMB:{sim_globals.network_data/1e6:.2f} IO:{sim_globals.io_requests}")
+                m_blocks.value = bc
+                m_diff.set(diff)
+                m_abt.set(ti / (bc - last_b) if bc - last_b else 0)
+                m_tps.set(dtx / ti if ti > 0 else 0)
+                m_infl.set((dcoins / last_coins) * (sim_globals.YEAR / ti) * 100 if last_coins > 0 else 0)
+                metrics.sample(env.now)
+                if not dbg:
+                    print_sum(env.now, bc, blocks_limit, diff, th, metrics.latest())
                 last_t, last_b, last_tx, last_coins = env.now, bc, sim_globals.total_tx, sim_globals.total_coins
-                last_infl = infl
+                last_infl = m_infl.value
+
+            if checkpoint is not None and checkpoint.due(bc):
+                pending = None
+                if propagation != "shortest-path":
+                    pending = {'id': b.id, 'txs': b.tx, 'dt': b.dt, 'optimized_txs': b.optimized_txs,
+                               'blobs': [blob.size for blob in b.blobs], 'source': source.id,
+                               'delay': validation_delay}
+                checkpoint.save(env, {
+                    'bc': bc, 'lt': lt, 'la': la, 'ba': ba,
+                    'last_t': last_t, 'last_b': last_b, 'last_tx': last_tx,
+                    'last_coins': last_coins, 'last_infl': last_infl,
+                    'diff': diff, 'reward': reward, 'halvings': halvings,
+                    'pool_processed': pool_processed,
+                    'prop': [prop_blocks, prop_median, prop_p90, prop_full, prop_coverage],
+                }, pending)
 
     finally:
-        # Final summary
+        # Final summary, from a last sample of the metrics (abt/tps over the whole run)
+        if gossip is not None:
+            gossip.advance(env.now)
+        m_blocks.value = bc
+        m_diff.set(diff)
+        m_infl.set(last_infl)
         total_time = env.now
-        abt = total_time / bc if bc else 0
-        tps_total = sim_globals.total_tx / total_time if total_time > 0 else 0
-        infl_final = last_infl
-        simulation_time = time.time() - sim_globals.start_time
-        if blocks_limit:
-            print(f"[******] End B:{bc}/{blocks_limit} 100.0% abt:{abt:.2f}s tps:{tps_total:.2f} "
-                f"infl:{infl_final:.2f}% Diff:{human(diff)} H:{human(th)} "
-                f"Tx:{sim_globals.total_tx} C:{human(sim_globals.total_coins)} Pool:{len(sim_globals.pool)} "
-                f"NMB:{sim_globals.network_data/1e6:.2f} IO:{sim_globals.io_requests}")
-            print(f"\nSimulation completed in {simulation_time:.2f} seconds")
-            print(f"Simulated blockchain time: {env.now:.2f} seconds")
-        else:
-            print(f"[******] End B:{bc} abt:{abt:.2f}s tps:{tps_total:.2f} "
-                f"infl:{infl_final:.2f}% Diff:{human(diff)} H:{human(th)} "
-                f"Tx:{sim_globals.total_tx} C:{human(sim_globals.total_coins)} Pool:{len(sim_globals.pool)} "
-                f"NMB:{sim_globals.network_data/1e6:.2f} IO:{sim_globals.io_requests}")
-            print(f"\nSimulation completed in {simulation_time:.2f} seconds")
-            print(f"Simulated blockchain time: {env.now:.2f} seconds")
+        m_abt.set(total_time / bc if bc else 0)
+        m_tps.set(sim_globals.total_tx / total_time if total_time > 0 else 0)
+        metrics.sample(env.now)
+        summary = finish_run(env.now, bc, blocks_limit, diff, th, metrics.latest())
+        if prop_blocks:
+            print(f"Propagation: median:{prop_median/prop_blocks:.3f}s p90:{prop_p90/prop_blocks:.3f}s "
+                f"full:{prop_full:.3f}s coverage:{prop_coverage/prop_blocks*100:.1f}%")
+            summary.update(prop_median=prop_median / prop_blocks, prop_p90=prop_p90 / prop_blocks,
+                           prop_full=prop_full, prop_coverage=prop_coverage / prop_blocks)
+
+    # Process value of the coordinator: the end-of-run summary
+    return summary
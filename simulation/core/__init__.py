@@ -1,6 +1,8 @@
 from .block import Block
 from .node import Node
-from .miner import Miner
-from .wallet import wallet
+from .node_table import NodeTable
+from .miner import Miner, MiningPool
+from .wallet import wallet, WalletArrivals
+from .mempool import Mempool, FeeMempool
 
-__all__ = ['Block', 'Node', 'Miner', 'wallet']
+__all__ = ['Block', 'Node', 'NodeTable', 'Miner', 'MiningPool', 'wallet', 'WalletArrivals', 'Mempool', 'FeeMempool']
@@ -1,5 +1,48 @@
 import random
 import hashlib
+from functools import lru_cache
+
+# One shared filler buffer backs every virtual blob payload
+_FILL = b'x'
+_filler = b''
+
+
+def _payload_view(size):
+    # Read-only view of the first `size` bytes; the buffer only grows (doubling)
+    global _filler
+    if size > len(_filler):
+        _filler = _FILL * max(size, 2 * len(_filler), 128 * 1024)
+    return memoryview(_filler)[:size]
+
+
+@lru_cache(maxsize=4096)
+def blob_commitment(size, seed=0):
+    """Deterministic commitment of a virtual blob, memoized by (size, content seed)."""
+    return hashlib.sha256(b"blob:%d:%d" % (seed, size)).hexdigest()
+
+
+class VirtualBlobData:
+    """
+    Blob payload that is only a size and a content seed. No bytes are
+    allocated; `view()` returns a read-only memoryview of the shared filler
+    buffer when a real payload is needed.
+    """
+    __slots__ = ('size', 'seed')
+
+    def __init__(self, size, seed=0):
+        self.size = size
+        self.seed = seed
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def commitment(self):
+        return blob_commitment(self.size, self.seed)
+
+    def view(self):
+        return _payload_view(self.size)
+
 
 class Blob:
     def __init__(self, blob_id, data, commitment=None):
@@ -9,8 +52,17 @@ class Blob:
         self.commitment = commitment or self._generate_commitment()
         
     def _generate_commitment(self):
+        if isinstance(self.data, VirtualBlobData):
+            return self.data.commitment
         return hashlib.sha256(self.data.encode() if isinstance(self.data, str) else self.data).hexdigest()
 
+    @property
+    def payload(self):
+        """The blob bytes; a shared read-only memoryview for virtual blobs."""
+        if isinstance(self.data, VirtualBlobData):
+            return self.data.view()
+        return self.data
+
 class LightweightTransaction:
     def __init__(self, tx_id, blob_commitment=None, reduced_size_factor=0.1):
         self.tx_id = tx_id
@@ -0,0 +1,340 @@
+import heapq
+import random
+from collections import deque
+import numpy as np
+
+from ..metrics import Histogram
+
+# Fee-rate histogram bins (sat/vB)
+FEE_EDGES = np.geomspace(0.1, 1e4, 101)
+
+
+class Mempool:
+    """
+    Ring buffer of pending transactions backed by two NumPy arrays
+    (wallet ids and arrival times).
+
+    append() is O(1) amortized, popleft()/discard() are O(k) and never
+    shift the remaining entries. The buffer doubles when full and halves
+    when it drains below a quarter, so memory follows the live backlog
+    instead of the peak. If max_capacity is set, arrivals beyond it are
+    dropped and counted in self.dropped.
+    """
+
+    MIN_CAPACITY = 1024
+
+    def __init__(self, capacity=MIN_CAPACITY, max_capacity=None):
+        capacity = max(int(capacity), self.MIN_CAPACITY)
+        if max_capacity is not None:
+            capacity = min(capacity, int(max_capacity))
+        self.max_capacity = max_capacity
+        self._wids = np.empty(capacity, dtype=np.int64)
+        self._times = np.empty(capacity, dtype=np.float64)
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    @property
+    def capacity(self):
+        return self._wids.shape[0]
+
+    @property
+    def nbytes(self):
+        return self._wids.nbytes + self._times.nbytes
+
+    def _resize(self, capacity):
+        wids = np.empty(capacity, dtype=np.int64)
+        times = np.empty(capacity, dtype=np.float64)
+        if self._size:
+            w, t = self.peek(self._size)
+            wids[:self._size] = w
+            times[:self._size] = t
+        self._wids, self._times = wids, times
+        self._head = 0
+
+    def _reserve(self, extra):
+        """Grow so that `extra` more entries fit; returns how many actually fit."""
+        need = self._size + extra
+        cap = self.capacity
+        if need <= cap:
+            return extra
+        if self.max_capacity is not None and cap >= self.max_capacity:
+            return max(0, cap - self._size)
+        new_cap = cap
+        while new_cap < need:
+            new_cap *= 2
+        if self.max_capacity is not None:
+            new_cap = min(new_cap, int(self.max_capacity))
+        self._resize(new_cap)
+        return min(extra, new_cap - self._size)
+
+    def append(self, wid, t):
+        if self._size == self.capacity and self._reserve(1) == 0:
+            self.dropped += 1
+            return
+        i = (self._head + self._size) % self.capacity
+        self._wids[i] = wid
+        self._times[i] = t
+        self._size += 1
+
+    def extend(self, wids, times):
+        """Bulk insert arrays of wallet ids and arrival times (in arrival order)."""
+        wids = np.asarray(wids)
+        times = np.asarray(times)
+        n = wids.shape[0]
+        if n == 0:
+            return
+        fit = self._reserve(n)
+        if fit < n:
+            self.dropped += n - fit
+            wids, times, n = wids[:fit], times[:fit], fit
+            if n == 0:
+                return
+        cap = self.capacity
+        start = (self._head + self._size) % cap
+        first = min(n, cap - start)
+        self._wids[start:start + first] = wids[:first]
+        self._times[start:start + first] = times[:first]
+        if first < n:
+            self._wids[:n - first] = wids[first:]
+            self._times[:n - first] = times[first:]
+        self._size += n
+
+    def peek(self, k):
+        """
+        Return (wids, times) for the oldest k transactions without removing them.
+        The arrays are views into the buffer when the range does not wrap
+        (and copies when it does); views are only valid until the next insert.
+        """
+        k = min(int(k), self._size)
+        start = self._head
+        end = start + k
+        cap = self.capacity
+        if end <= cap:
+            return self._wids[start:end], self._times[start:end]
+        end -= cap
+        return (np.concatenate((self._wids[start:], self._wids[:end])),
+                np.concatenate((self._times[start:], self._times[:end])))
+
+    def discard(self, k):
+        """Drop the oldest k transactions; returns how many were removed."""
+        k = min(int(k), self._size)
+        self._head = (self._head + k) % self.capacity
+        self._size -= k
+        if self._size == 0:
+            self._head = 0
+        cap = self.capacity
+        if cap > self.MIN_CAPACITY and self._size < cap // 4:
+            self._resize(max(cap // 2, self.MIN_CAPACITY))
+        return k
+
+    def popleft(self, k):
+        """Remove and return the oldest k transactions as (wids, times)."""
+        k = min(int(k), self._size)
+        if k == 0:
+            return self._wids[:0], self._times[:0]
+        wids, times = self.peek(k)
+        if self._size - k < self.capacity // 4 and self.capacity > self.MIN_CAPACITY:
+            # discard() is about to shrink the buffer under the views
+            wids, times = wids.copy(), times.copy()
+        self.discard(k)
+        return wids, times
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        if self.capacity > self.MIN_CAPACITY:
+            self._wids = np.empty(self.MIN_CAPACITY, dtype=np.int64)
+            self._times = np.empty(self.MIN_CAPACITY, dtype=np.float64)
+
+
+class FeeMempool:
+    """
+    Fee-priority mempool (--mempool fee). Every transaction gets a fee
+    rate (sat/vB) and a virtual size when it arrives, and blocks take the
+    highest fee rates first instead of the oldest transactions.
+
+    Each wallet's transactions wait in nonce (arrival) order in a deque of
+    their own and only the head of each deque can be selected, so a
+    wallet's transactions are included in order. Heads sit in a max-heap
+    by fee rate and tails in a min-heap: an insert is O(log n), selecting
+    k transactions O(k log n), and while the pool holds more than
+    max_bytes of vsize the cheapest tail is evicted (dropping a tail never
+    strands a later nonce). Heap entries are checked against the deques
+    when popped rather than removed eagerly, and the heaps are rebuilt
+    when stale entries outnumber live ones.
+
+    peek(k) takes the selection out of the deques and discard(n) commits
+    the first n of it, putting the rest back, so coord() uses both pools
+    the same way. Fee rates of included transactions go to a Histogram
+    for running percentiles.
+    """
+
+    FEE_RATE_MEDIAN = 10.0  # sat/vB, lognormal
+    FEE_RATE_SIGMA = 1.0
+    VSIZE_MEDIAN = 250  # vbytes, lognormal
+    VSIZE_SIGMA = 0.5
+    MIN_VSIZE = 60
+
+    def __init__(self, max_bytes=None, fee_hist=None, rng=None):
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        self.rng = rng
+        self.max_bytes = max_bytes
+        self.fee_hist = fee_hist if fee_hist is not None else Histogram('fee_rate', FEE_EDGES)
+        self.clear()
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.min_fee = 0.0  # fee rate of the last eviction
+
+    def clear(self):
+        self.wallets = {}  # wid -> deque of (seq, fee rate, vsize, time)
+        self.heads = []  # (-fee rate, seq, wid)
+        self.tails = []  # (fee rate, -seq, wid)
+        self.selected = []  # (wid, entry) taken by peek(), not yet discarded
+        self.seq = 0
+        self._size = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    @property
+    def nbytes(self):
+        # Rough Python object footprint: entries, heap tuples and deques
+        return self._size * 100 + (len(self.heads) + len(self.tails)) * 72 + len(self.wallets) * 640
+
+    def append(self, wid, t):
+        self.extend((wid,), (t,))
+
+    def extend(self, wids, times):
+        """Bulk insert wallet ids and arrival times; fee rates and vsizes are drawn here."""
+        wids = np.asarray(wids)
+        n = wids.shape[0]
+        if n == 0:
+            return
+        self._unselect()
+        fees = self.rng.lognormal(np.log(self.FEE_RATE_MEDIAN), self.FEE_RATE_SIGMA, n)
+        vsizes = np.maximum(self.rng.lognormal(np.log(self.VSIZE_MEDIAN), self.VSIZE_SIGMA, n).astype(np.int64),
+                            self.MIN_VSIZE)
+        wallets, heads, tails = self.wallets, self.heads, self.tails
+        seq = self.seq
+        for wid, t, fee, vsize in zip(wids.tolist(), np.asarray(times).tolist(), fees.tolist(), vsizes.tolist()):
+            q = wallets.get(wid)
+            if q is None:
+                q = wallets[wid] = deque()
+            q.append((seq, fee, vsize, t))
+            if len(q) == 1:
+                heapq.heappush(heads, (-fee, seq, wid))
+            heapq.heappush(tails, (fee, -seq, wid))
+            seq += 1
+        self.seq = seq
+        self._size += n
+        self.bytes += int(vsizes.sum())
+        self._evict()
+        self._compact()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self.bytes > self.max_bytes and self.tails:
+            _, nseq, wid = heapq.heappop(self.tails)
+            q = self.wallets.get(wid)
+            if not q or q[-1][0] != -nseq:
+                continue
+            _, fee, vsize, _ = q.pop()
+            self._size -= 1
+            self.bytes -= vsize
+            self.dropped += 1
+            self.dropped_bytes += vsize
+            self.min_fee = fee
+            if q:
+                heapq.heappush(self.tails, (q[-1][1], -q[-1][0], wid))
+            else:
+                del self.wallets[wid]
+
+    def _compact(self):
+        # Rebuild a heap once stale entries dominate it
+        if len(self.heads) > 2 * len(self.wallets) + 1024:
+            self.heads = [(-q[0][1], q[0][0], wid) for wid, q in self.wallets.items() if q]
+            heapq.heapify(self.heads)
+        if len(self.tails) > 2 * len(self.wallets) + 1024:
+            self.tails = [(q[-1][1], -q[-1][0], wid) for wid, q in self.wallets.items() if q]
+            heapq.heapify(self.tails)
+
+    def peek(self, k):
+        """
+        Return (wids, times) of the k best transactions by fee rate (in
+        nonce order per wallet). They stay counted in the pool until
+        discard(); any other call puts them back.
+        """
+        k = min(int(k), self._size)
+        heads, wallets, selected = self.heads, self.wallets, self.selected
+        while len(selected) < k:
+            _, seq, wid = heapq.heappop(heads)
+            q = wallets.get(wid)
+            if not q or q[0][0] != seq:
+                continue
+            selected.append((wid, q.popleft()))
+            if q:
+                heapq.heappush(heads, (-q[0][1], q[0][0], wid))
+        wids = np.fromiter((wid for wid, _ in selected[:k]), dtype=np.int64, count=k)
+        times = np.fromiter((entry[3] for _, entry in selected[:k]), dtype=np.float64, count=k)
+        return wids, times
+
+    def _unselect(self):
+        # Put transactions peeked but not discarded back at the head of their wallets
+        for wid, entry in reversed(self.selected):
+            q = self.wallets.get(wid)
+            if q is None:
+                q = self.wallets[wid] = deque()
+            q.appendleft(entry)
+            heapq.heappush(self.heads, (-entry[1], entry[0], wid))
+            if len(q) == 1:
+                heapq.heappush(self.tails, (entry[1], -entry[0], wid))
+        self.selected = []
+
+    def discard(self, k):
+        """Remove the k best transactions (as peek(k) returns them); returns how many were removed."""
+        k = min(int(k), self._size)
+        if len(self.selected) < k:
+            self.peek(k)
+        done, self.selected = self.selected[:k], self.selected[k:]
+        self._unselect()
+        fees = []
+        for wid, (_, fee, vsize, _) in done:
+            self.bytes -= vsize
+            fees.append(fee)
+            if wid in self.wallets and not self.wallets[wid]:
+                del self.wallets[wid]
+        self._size -= k
+        self.fee_hist.observe_many(fees)
+        self._compact()
+        return k
+
+    def popleft(self, k):
+        """Remove and return the k best transactions as (wids, times)."""
+        wids, times = self.peek(k)
+        self.discard(wids.shape[0])
+        return wids, times
+
+    def fee_stats(self):
+        """Fee-rate percentiles of the included transactions and the eviction totals."""
+        self.fee_hist.flush()
+        return {
+            'fee_p10': self.fee_hist.quantile(0.1),
+            'fee_p50': self.fee_hist.quantile(0.5),
+            'fee_p90': self.fee_hist.quantile(0.9),
+            'mempool_bytes': self.bytes,
+            'mempool_dropped': self.dropped,
+            'mempool_min_fee': self.min_fee,
+        }
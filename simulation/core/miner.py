@@ -1,5 +1,8 @@
 import random
+import bisect
+import itertools
 import simulation.globals as sim_globals
+from .blobs import VirtualBlobData
 
 class Miner:
     def __init__(self, i, h):
@@ -14,10 +17,11 @@ class Miner:
             ev.succeed(self)
         yield ev
     
-    def create_blob_data(self, size=None):
+    def create_blob_data(self, size=None, seed=0):
         """
         Create sample blob data for testing Danksharding.
-        In practice, this would be actual application data.
+        In practice, this would be actual application data. The data is
+        virtual: only its size and content seed are kept.
         """
         if not sim_globals.danksharding_enabled:
             return None
@@ -25,8 +29,7 @@ class Miner:
         if size is None:
             size = random.randint(1024, 32768)  # Random size between 1KB and 32KB
         
-        # Generate random data for simulation
-        return b'x' * size
+        return VirtualBlobData(size, seed)
     
     def should_include_blobs(self):
         """Determine if this miner should include blobs in the next block"""
@@ -34,3 +37,28 @@ class Miner:
             return False
         # 80% chance to include blobs for better optimization (was 30%)
         return random.random() < 0.8
+
+
+class MiningPool:
+    """
+    Analytic replacement for running one Miner.mine() process per miner.
+
+    The first of several independent exponential timers with rates h_i/d
+    fires after an exponential time with rate sum(h_i)/d, and miner i wins
+    with probability h_i/sum(h_i); the race is sampled in one draw and the
+    winner is found by bisecting the cumulative hashrate table.
+    """
+
+    def __init__(self, miners):
+        self.miners = list(miners)
+        self.cumulative = list(itertools.accumulate(m.h for m in self.miners))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+
+    def pick_winner(self):
+        i = bisect.bisect_right(self.cumulative, random.random() * self.total)
+        return self.miners[min(i, len(self.miners) - 1)]
+
+    def mine(self, env, d):
+        # Use with `yield from` inside a process; returns the winning miner
+        yield env.timeout(random.expovariate(self.total / d))
+        return self.pick_winner()
@@ -1,15 +1,14 @@
 import simulation.globals as sim_globals
 import random
-import json
-import os
-from simulation.utils.distance import calculate_distance
-from ..network.message import BlockMessage
-from ..network.latency import calculate_network_latency, calculate_transmission_time
-
-def load_locations():
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'network', 'locations.json')
-    with open(config_path, 'r') as f:
-        return json.load(f)
+import numpy as np
+from .seen import SeenBlocks
+from ..network.message import (BlockMessage, AnnouncementMessage, RequestMessage, CompactBlockMessage,
+                               BlockTxnRequestMessage, BlockTxnMessage)
+from ..network.relay import missing_transactions
+from ..network.uplink import Uplink
+from ..network.latency import (load_locations, get_region_latency, calculate_network_latency,
+                               calculate_transmission_time, calculate_transmission_times, bound_delay,
+                               time_scale)
 
 _locations_data = load_locations()
 
@@ -17,14 +16,16 @@ class Node:
     def __init__(self, env, i, location=None, bandwidth_mbps=None, blocktime=600):
         self.env = env
         self.id = i
-        self.blocks = set()
+        self.blocks = SeenBlocks()
+        self.requested = SeenBlocks()  # blocks asked for (inv) or being rebuilt (compact)
+        self._uplink = None
         self.neighbors = []
         self.blocktime = blocktime
-        self._delay_cache = {}  # Cache for network delays
-    
+
         if location is None:
             location = random.choice(list(_locations_data.keys()))
         self.location = location
+        self.region = get_region_latency().region_of(location)
         self.coordinates = (_locations_data[location]["latitude"], _locations_data[location]["longitude"])
         
         if bandwidth_mbps is None:
@@ -32,39 +33,91 @@ class Node:
         self.bandwidth_mbps = bandwidth_mbps
         self.bandwidth_bps = bandwidth_mbps * 1024 * 1024  # b/s
     
+    @property
+    def neighbors(self):
+        return self._neighbors
+
+    @neighbors.setter
+    def neighbors(self, nodes):
+        # A list of nodes, or a NeighborView into Topology arrays
+        self._neighbors = nodes
+        self._edge_latency = None  # per-edge base latency, built on first use
+
+    @property
+    def uplink(self):
+        # Created on the first send with --uplink shared
+        if self._uplink is None:
+            self._uplink = Uplink(self.env)
+        return self._uplink
+
+    @property
+    def neighbor_ids(self):
+        ids = getattr(self._neighbors, 'ids', None)
+        if ids is None:
+            ids = np.fromiter((n.id for n in self._neighbors), dtype=np.int32, count=len(self._neighbors))
+        return ids
+
+    def _edge_base_latency(self):
+        # Deterministic part of the latency to each neighbor, one float32 per edge
+        if self._edge_latency is None:
+            regions = np.fromiter((n.region for n in self._neighbors), dtype=np.intp, count=len(self._neighbors))
+            self._edge_latency = get_region_latency().base[self.region, regions].astype(np.float32)
+        return self._edge_latency
+
+    def _bound_delay(self, total_delay):
+        return bound_delay(total_delay, self.blocktime)
+
     def _calculate_network_delay(self, target_node, message_size):
 
         if target_node is None:
             return 0.001
-            
-        cache_key = (target_node.id, message_size)
-        if cache_key in self._delay_cache:
-            return self._delay_cache[cache_key]
-            
+
         latency = calculate_network_latency(self, target_node)
         transmission_time = calculate_transmission_time(message_size, self.bandwidth_bps)
-        
-        total_delay = latency + transmission_time
-        
-        max_network_delay = min(self.blocktime * 0.01, 5.0)  # 1% of blocktime or 5 seconds max
-        if total_delay > max_network_delay:
-            total_delay = max_network_delay
-            
-        if self.blocktime < 300:
-            total_delay = total_delay * 0.1
-        
-        # Ensure delay is always positive (Danksharding can cause timing issues)
-        total_delay = max(0.001, total_delay)
-            
-        self._delay_cache[cache_key] = total_delay
-        return total_delay
+
+        return float(self._bound_delay(latency + transmission_time))
+
+    def _edge_delays(self, message_size):
+        """Delays to every neighbor for one message: cached base latency plus fresh jitter and transmission time."""
+        regions = get_region_latency()
+        latency = regions.sample_many(self._edge_base_latency())
+        transmission = calculate_transmission_times(message_size, self.bandwidth_bps, latency.shape[0], regions.rng)
+        return self._bound_delay(latency + transmission)
+
+    def _upload(self, b, size, relay, skip_id=-1):
+        # Shared uplink: the copies to the neighbors split the bandwidth, then each travels its latency
+        regions = get_region_latency()
+        latency = self._bound_delay(regions.sample_many(self._edge_base_latency())).tolist()
+        jobs = [(relay, neighbor, b, delay) for neighbor, delay in zip(self.neighbors, latency)
+                if neighbor.id != skip_id]
+        work = calculate_transmission_times(size, self.bandwidth_bps, len(jobs), regions.rng) * time_scale(self.blocktime)
+        self.uplink.send_many(work.tolist(), self._uploaded, jobs)
+        return len(jobs)
+
+    def _uploaded(self, job):
+        relay, target_node, b, delay = job
+        self.env.process(relay(target_node, b, delay))
     
     def send_message(self, message, target_node):
-        total_delay = self._calculate_network_delay(target_node, message.size)
+        if sim_globals.uplink == "shared" and target_node is not None:
+            total_delay = None
+            latency = float(self._bound_delay(calculate_network_latency(self, target_node)))
+        else:
+            total_delay = self._calculate_network_delay(target_node, message.size)
         
         # Network metrics
         sim_globals.io_requests += 1
         sim_globals.network_data += message.size
+        if sim_globals.relay_stats is not None:
+            sim_globals.relay_stats.sent(getattr(message, 'block_id', None), message.size)
+
+        if total_delay is None:
+            # Wait for the uplink, then the latency
+            done = self.env.event()
+            work = calculate_transmission_time(message.size, self.bandwidth_bps) * time_scale(self.blocktime)
+            self.uplink.send(work, done.succeed)
+            yield done
+            total_delay = latency
         
         yield self.env.timeout(total_delay)
         return message
@@ -81,21 +134,38 @@ class Node:
             return
             
         self.blocks.add(b.id)
+        if sim_globals.trace is not None:
+            sim_globals.trace.arrival(b.id, self.id, self.env.now)
+        if sim_globals.relay_stats is not None:
+            sim_globals.relay_stats.arrival(b.id, self.env.now)
         
-        if sender_node is not None:
+        if sender_node is None:
+            sim_globals.io_requests += 1
+            sim_globals.network_data += b.size
+        elif sim_globals.relay == "push":
             block_msg = BlockMessage(sender_node.id, b)
             sim_globals.io_requests += 1
             sim_globals.network_data += block_msg.size
-        else:
-            sim_globals.io_requests += 1
-            sim_globals.network_data += b.size
-        
-        for neighbor in self.neighbors:
-            if sender_node is not None:
-                network_delay = self._calculate_network_delay(neighbor, b.size)
+        # inv and compact count their messages as they are sent
+
+        if sim_globals.relay == "inv":
+            self._relay_announce(b, sender_node)
+        elif sim_globals.relay == "compact":
+            self._relay_compact(b, sender_node)
+        elif sender_node is not None and sim_globals.uplink == "shared":
+            sent = self._upload(b, b.size, self._delayed_propagation)
+            if sim_globals.relay_stats is not None:
+                sim_globals.relay_stats.sent(b.id, sent * b.size)
+        elif sender_node is not None:
+            delays = self._edge_delays(b.size).tolist()
+            if sim_globals.relay_stats is not None:
+                sim_globals.relay_stats.sent(b.id, len(delays) * b.size)
+            for neighbor, network_delay in zip(self.neighbors, delays):
                 self.env.process(self._delayed_propagation(neighbor, b, network_delay))
-            else:
-            
+        else:
+            if sim_globals.relay_stats is not None:
+                sim_globals.relay_stats.sent(b.id, len(self.neighbors) * b.size)
+            for neighbor in self.neighbors:
                 self.env.process(neighbor.receive(b, sender_node=self))
     
     def _delayed_propagation(self, target_node, block, delay):
@@ -103,6 +173,53 @@ class Node:
         safe_delay = max(0.001, delay)  # Minimum 1ms delay
         yield self.env.timeout(safe_delay)
         yield self.env.process(target_node.receive(block, sender_node=self))
+
+    def _fan_out(self, b, sender_node, message, relay):
+        # Send `message` about block b to every neighbor but the one it came from
+        sender_id = sender_node.id if sender_node is not None else -1
+        if sim_globals.uplink == "shared":
+            sent = self._upload(b, message.size, relay, skip_id=sender_id)
+        else:
+            delays = self._edge_delays(message.size).tolist()
+            sent = 0
+            for neighbor, network_delay in zip(self.neighbors, delays):
+                if neighbor.id != sender_id:
+                    self.env.process(relay(neighbor, b, max(0.001, network_delay)))
+                    sent += 1
+        sim_globals.io_requests += sent
+        sim_globals.network_data += sent * message.size
+        if sim_globals.relay_stats is not None:
+            sim_globals.relay_stats.sent(b.id, sent * message.size)
+
+    def _relay_announce(self, b, sender_node):
+        self._fan_out(b, sender_node, AnnouncementMessage(self.id, b.id), self._announce)
+
+    def _announce(self, target_node, block, delay):
+        # inv -> getdata -> block; the target asks only the first peer that announces
+        yield self.env.timeout(delay)
+        if block.id in target_node.blocks or block.id in target_node.requested:
+            return
+        target_node.requested.add(block.id)
+        yield self.env.process(target_node.send_message(RequestMessage(target_node.id, block.id), self))
+        yield self.env.process(self.send_message(BlockMessage(self.id, block), target_node))
+        yield self.env.process(target_node.receive(block, sender_node=self))
+
+    def _relay_compact(self, b, sender_node):
+        self._fan_out(b, sender_node, CompactBlockMessage(self.id, b), self._send_compact)
+
+    def _send_compact(self, target_node, block, delay):
+        # cmpctblock, plus a getblocktxn/blocktxn round trip for transactions
+        # the target has not seen yet
+        yield self.env.timeout(delay)
+        if block.id in target_node.blocks or block.id in target_node.requested:
+            return
+        target_node.requested.add(block.id)
+        missing = missing_transactions(block, self.env.now)
+        if missing:
+            yield self.env.process(target_node.send_message(
+                BlockTxnRequestMessage(target_node.id, block.id, missing), self))
+            yield self.env.process(self.send_message(BlockTxnMessage(self.id, block.id, missing), target_node))
+        yield self.env.process(target_node.receive(block, sender_node=self))
     
     def _process_blobs(self, block):
         """Process blobs in a received block for Danksharding"""
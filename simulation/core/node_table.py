@@ -0,0 +1,148 @@
+import random
+import numpy as np
+from .node import Node
+from .seen import SeenTable
+from ..network.latency import get_region_latency
+from ..network.topology import NeighborView
+from ..network.uplink import Uplink
+
+
+class NodeTable:
+    """
+    Struct-of-arrays storage for every node in the network.
+
+    Region index, bandwidth and the CSR neighbor arrays live in contiguous
+    NumPy arrays instead of one Python Node per peer. Indexing the table
+    returns a TableNode, a throwaway accessor that behaves like a Node
+    (receive(), get_network_info(), ...) but keeps no state of its own.
+    """
+
+    def __init__(self, env, count, blocktime=600, regions=None, bandwidth_mbps=None, rng=None):
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        latency = get_region_latency()
+        self.env = env
+        self.count = count
+        self.blocktime = blocktime
+
+        if regions is None:
+            regions = rng.integers(0, len(latency.names), size=count)
+        self.region = np.asarray(regions, dtype=np.int16)
+
+        if bandwidth_mbps is None:
+            bandwidth_mbps = rng.uniform(50, 200, size=count)
+        self.bandwidth_mbps = np.asarray(bandwidth_mbps, dtype=np.float32)
+
+        self.indptr = np.zeros(count + 1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.edge_latency = np.zeros(0, dtype=np.float32)
+        self.seen = SeenTable(count)
+        self.requested = None  # SeenTable, created on first use by inv/compact relay
+        self.uplinks = {}  # node id -> Uplink, for nodes that sent with --uplink shared
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("node index out of range")
+        return TableNode(self, i)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield TableNode(self, i)
+
+    @property
+    def nbytes(self):
+        return (self.region.nbytes + self.bandwidth_mbps.nbytes + self.indptr.nbytes
+                + self.indices.nbytes + self.edge_latency.nbytes + self.seen.nbytes
+                + (self.requested.nbytes if self.requested is not None else 0))
+
+    def set_topology(self, topology):
+        """Adopt a Topology's CSR arrays and precompute the base latency of every edge."""
+        self.indptr = topology.indptr
+        self.indices = topology.indices
+        src = np.repeat(self.region, np.diff(self.indptr))
+        self.edge_latency = get_region_latency().base[src, self.region[self.indices]].astype(np.float32)
+
+    def neighbors_of(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+
+class TableNode(Node):
+    """Node accessor backed by a NodeTable row."""
+
+    def __init__(self, table, i):
+        self.table = table
+        self.id = i
+
+    def __eq__(self, other):
+        return isinstance(other, TableNode) and other.table is self.table and other.id == self.id
+
+    def __hash__(self):
+        return hash((id(self.table), self.id))
+
+    @property
+    def env(self):
+        return self.table.env
+
+    @property
+    def blocktime(self):
+        return self.table.blocktime
+
+    @property
+    def blocks(self):
+        return self.table.seen.row(self.id)
+
+    @property
+    def requested(self):
+        t = self.table
+        if t.requested is None:
+            t.requested = SeenTable(t.count)
+        return t.requested.row(self.id)
+
+    @property
+    def uplink(self):
+        link = self.table.uplinks.get(self.id)
+        if link is None:
+            link = self.table.uplinks[self.id] = Uplink(self.env)
+        return link
+
+    @property
+    def region(self):
+        return int(self.table.region[self.id])
+
+    @property
+    def location(self):
+        return get_region_latency().names[self.region]
+
+    @property
+    def coordinates(self):
+        lat, lon = get_region_latency().coordinates[self.region]
+        return (float(lat), float(lon))
+
+    @property
+    def bandwidth_mbps(self):
+        return float(self.table.bandwidth_mbps[self.id])
+
+    @property
+    def bandwidth_bps(self):
+        return self.bandwidth_mbps * 1024 * 1024  # b/s
+
+    @property
+    def neighbors(self):
+        return NeighborView(self.table, self.neighbor_ids)
+
+    @neighbors.setter
+    def neighbors(self, nodes):
+        raise AttributeError("TableNode neighbors come from NodeTable.set_topology()")
+
+    @property
+    def neighbor_ids(self):
+        return self.table.neighbors_of(self.id)
+
+    def _edge_base_latency(self):
+        t = self.table
+        return t.edge_latency[t.indptr[self.id]:t.indptr[self.id + 1]]
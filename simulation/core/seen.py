@@ -0,0 +1,126 @@
+import numpy as np
+
+# Blocks more than this many ids behind the newest one a node has seen
+# are treated as final: any late copy of them counts as a duplicate.
+DEFAULT_WINDOW = 256
+
+
+class SeenBlocks:
+    """
+    Seen-block set for one node with bounded memory.
+
+    Every id below `watermark` counts as seen; ids in
+    [watermark, watermark + window) are tracked in a bitmap where bit k
+    stands for id watermark + k. Adding an id past the window slides the
+    watermark forward, so memory depends on the propagation window, not on
+    chain length. Membership and insertion are O(1).
+    """
+
+    __slots__ = ('window', 'watermark', 'bits', 'count')
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.watermark = 0
+        self.bits = 0
+        self.count = 0
+
+    def __contains__(self, block_id):
+        k = block_id - self.watermark
+        if k < 0:
+            return True
+        if k >= self.window:
+            return False
+        return bool((self.bits >> k) & 1)
+
+    def add(self, block_id):
+        k = block_id - self.watermark
+        if k < 0:
+            return
+        if k >= self.window:
+            shift = k - self.window + 1
+            self.bits >>= shift
+            self.watermark += shift
+            k -= shift
+        elif (self.bits >> k) & 1:
+            return
+        self.bits |= 1 << k
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+
+class SeenTable:
+    """
+    SeenBlocks for every node of a NodeTable: one watermark per node and a
+    (nodes x window/64) uint64 bitmap.
+    """
+
+    def __init__(self, count, window=DEFAULT_WINDOW):
+        self.window = -(-window // 64) * 64
+        self.watermark = np.zeros(count, dtype=np.int64)
+        self.words = np.zeros((count, self.window // 64), dtype=np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.watermark.nbytes + self.words.nbytes
+
+    def contains(self, i, block_id):
+        k = block_id - int(self.watermark[i])
+        if k < 0:
+            return True
+        if k >= self.window:
+            return False
+        return bool((int(self.words[i, k >> 6]) >> (k & 63)) & 1)
+
+    def add(self, i, block_id):
+        self.add_many(np.array([i]), block_id)
+
+    def add_many(self, nodes, block_id):
+        """Mark block_id as seen at every node in the index array `nodes`."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        k = block_id - self.watermark[nodes]
+        nodes, k = nodes[k >= 0], k[k >= 0]
+        over = k >= self.window
+        if over.any():
+            shifts = k[over] - self.window + 1
+            for s in np.unique(shifts).tolist():
+                rows = nodes[over][shifts == s]
+                self.words[rows] = self._shift_right(self.words[rows], s)
+                self.watermark[rows] += s
+            k = block_id - self.watermark[nodes]
+        self.words[nodes, k >> 6] |= np.left_shift(np.uint64(1), (k & 63).astype(np.uint64))
+
+    @staticmethod
+    def _shift_right(words, s):
+        # Shift each row's multiword bitmap right by s bits (word 0 is least significant)
+        q, r = divmod(s, 64)
+        out = np.zeros_like(words)
+        n = words.shape[1]
+        if q >= n:
+            return out
+        out[:, :n - q] = words[:, q:]
+        if r:
+            out = out >> np.uint64(r)
+            if n - q > 1:
+                out[:, :n - q - 1] |= words[:, q + 1:] << np.uint64(64 - r)
+        return out
+
+    def row(self, i):
+        return SeenRow(self, i)
+
+
+class SeenRow:
+    """The set-like view of one node's row, used as TableNode.blocks."""
+
+    __slots__ = ('table', 'i')
+
+    def __init__(self, table, i):
+        self.table = table
+        self.i = i
+
+    def __contains__(self, block_id):
+        return self.table.contains(self.i, block_id)
+
+    def add(self, block_id):
+        self.table.add(self.i, block_id)
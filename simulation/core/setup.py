@@ -1,14 +1,16 @@
 import simpy
-import random
+import numpy as np
 from simulation.core.node import Node
 from simulation.core.miner import Miner
+from simulation.network.topology import build_topology
 
 def setup_simulation(args):
     env = simpy.Environment()
 
     nodes = [Node(env, i) for i in range(args.nodes)]
-    for n in nodes:
-        n.neighbors = random.sample([x for x in nodes if x != n], args.neighbors)
+    regions = np.array([n.region for n in nodes], dtype=np.int32)
+    topology = build_topology(getattr(args, 'topology', 'k-out'), args.nodes, args.neighbors, regions=regions)
+    topology.attach(nodes)
 
     miners_list = [Miner(i, args.hashrate) for i in range(args.miners)]
     return env, nodes, miners_list
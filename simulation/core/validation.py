@@ -0,0 +1,97 @@
+# Transaction validation kernels for shard processing
+
+import hashlib
+import time
+import numpy as np
+
+# Typical single-signature verification cost, used when no calibration is done
+DEFAULT_TX_COST = 50e-6  # seconds per transaction
+
+
+class LegacyValidator:
+    """The original pure-Python busy loop: 100 str/hash rounds per transaction."""
+
+    name = 'legacy'
+
+    def validate(self, shard_id, transactions):
+        """Returns (processed, simulated_seconds); real CPU work does not advance simulated time."""
+        processed_count = 0
+        for tx in transactions:
+            # Simulate more intensive transaction validation work
+            # This represents the actual work that can be parallelized
+            for i in range(100):  # More computational work per transaction
+                hash_result = hash(str(tx) + str(shard_id) + str(i))
+                signature_check = hash_result % 1000000  # Simulate crypto work
+                if signature_check >= 0:  # Always true, but forces computation
+                    pass
+            processed_count += 1
+        return processed_count, 0.0
+
+
+class HashKernelValidator:
+    """
+    Real work, batched: each chunk of a shard batch is packed into one
+    NumPy buffer of (tx, shard, position) words and run through `rounds`
+    chained SHA-256 passes, so the work stays in C.
+    """
+
+    name = 'hash-kernel'
+
+    def __init__(self, rounds=100, chunk=4096):
+        self.rounds = rounds
+        self.chunk = chunk
+
+    def validate(self, shard_id, transactions):
+        txs = np.asarray(transactions, dtype=np.int64)
+        n = txs.shape[0]
+        digest = b''
+        for start in range(0, n, self.chunk):
+            batch = txs[start:start + self.chunk]
+            words = np.empty((batch.shape[0], 3), dtype=np.int64)
+            words[:, 0] = batch
+            words[:, 1] = shard_id
+            words[:, 2] = np.arange(start, start + batch.shape[0])
+            data = words.tobytes()
+            for _ in range(self.rounds):
+                digest = hashlib.sha256(digest + data).digest()
+        return n, 0.0
+
+
+class CostModelValidator:
+    """
+    No CPU work: validating a batch costs `tx_cost` simulated seconds per
+    transaction plus a fixed per-shard overhead, which the coordinator
+    adds before the block is broadcast.
+    """
+
+    name = 'cost-model'
+
+    def __init__(self, tx_cost=DEFAULT_TX_COST, shard_overhead=0.0):
+        self.tx_cost = tx_cost
+        self.shard_overhead = shard_overhead
+
+    @classmethod
+    def calibrate(cls, kernel=None, sample=20000):
+        """Cost model whose per-transaction cost is measured from a real kernel on this machine."""
+        kernel = kernel or HashKernelValidator()
+        txs = np.arange(sample, dtype=np.int64)
+        start = time.perf_counter()
+        kernel.validate(0, txs)
+        return cls(tx_cost=(time.perf_counter() - start) / sample)
+
+    def validate(self, shard_id, transactions):
+        n = len(transactions)
+        return n, n * self.tx_cost + self.shard_overhead
+
+
+VALIDATORS = ('legacy', 'hash-kernel', 'cost-model')
+
+
+def make_validator(kind, tx_cost=None):
+    if kind == 'legacy':
+        return LegacyValidator()
+    if kind == 'hash-kernel':
+        return HashKernelValidator()
+    if kind == 'cost-model':
+        return CostModelValidator(tx_cost=DEFAULT_TX_COST if tx_cost is None else tx_cost)
+    raise ValueError(f"Unknown validator '{kind}'. Available validators: {', '.join(VALIDATORS)}")
@@ -1,8 +1,61 @@
+import numpy as np
 import simulation.globals as sim_globals
 
 
 # Wallet sends transactions into pool
-def wallet(env, wid, count, interval):
-    for _ in range(count):
-        yield env.timeout(interval)
-        sim_globals.pool.append((wid, env.now))
+def wallet(env, wid, count, interval, first=None):
+    # first: delay of the first transaction when resuming mid-run
+    for i in range(count):
+        yield env.timeout(interval if first is None or i else first)
+        sim_globals.pool.append(wid, env.now)
+
+
+class WalletArrivals:
+    """
+    All fixed-interval wallets merged into one arrival generator.
+
+    Every wallet emits at the same ticks (interval, 2*interval, ...), so a
+    tick contributes wallet ids 0..wallets-1 in order, which is the order
+    the per-wallet processes append in. Tick times are accumulated the
+    same way SimPy accumulates env.now, so timestamps match exactly.
+    advance() inserts every arrival up to `now` in one vectorized batch.
+    """
+
+    def __init__(self, wallets, count, interval):
+        self.wallets = wallets
+        self.count = count
+        self.interval = interval
+        self.ticks = np.cumsum(np.full(count, interval, dtype=np.float64))
+        self.emitted = 0  # ticks already inserted into the pool
+        self.next_wake = None  # when wallet_arrivals() wakes up next
+        self._wids = np.arange(wallets, dtype=np.int64)
+
+    @property
+    def done(self):
+        return self.emitted >= self.count
+
+    def advance(self, now, pool=None):
+        """Insert all arrivals with time <= now; returns how many were added."""
+        if pool is None:
+            pool = sim_globals.pool
+        upto = int(np.searchsorted(self.ticks, now, side='right'))
+        if upto <= self.emitted:
+            return 0
+        ticks = self.ticks[self.emitted:upto]
+        self.emitted = upto
+        pool.extend(np.tile(self._wids, ticks.shape[0]), np.repeat(ticks, self.wallets))
+        return ticks.shape[0] * self.wallets
+
+
+def wallet_arrivals(env, arrivals, batch_interval):
+    """Single process driving WalletArrivals in batches of batch_interval seconds."""
+    if arrivals.next_wake is not None and arrivals.next_wake > env.now:
+        # Resumed from a checkpoint: keep the wake-up time of the original run
+        yield env.timeout(arrivals.next_wake - env.now)
+        arrivals.advance(env.now)
+    while not arrivals.done:
+        nxt = arrivals.ticks[arrivals.emitted]
+        delay = max(batch_interval, nxt - env.now)
+        arrivals.next_wake = env.now + delay
+        yield env.timeout(delay)
+        arrivals.advance(env.now)
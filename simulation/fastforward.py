@@ -0,0 +1,109 @@
+"""
+--fast-forward: the monetary-policy part of a run without the event loop.
+
+With no transactions, a run only produces block times, difficulty
+retargets, coin issuance and halvings. Every mining round is one
+exponential draw with rate hashrate/difficulty (as in MiningPool), so the
+inter-block times are drawn here in NumPy chunks, the difficulty is
+retargeted per 2016-block epoch and rewards are minted per block with the
+halving rules of coord(). The metrics series is sampled every print_int
+blocks and the summary has the same fields as coord()'s.
+
+Blocks are assumed to reach every node, so NMB and IO grow by one full
+block per node per block (what gossip converges to between blocks).
+Propagation statistics, per-block --debug lines and traces are not
+produced.
+"""
+import random
+import numpy as np
+
+import simulation.globals as sim_globals
+from .core.block import Block
+from .coordinator import register_metrics, print_sum, finish_run
+from .metrics import MetricsRegistry
+
+RETARGET_BLOCKS = 2016
+CHUNK = 1 << 16
+MAX_HALVINGS = 35
+
+
+def block_rewards(first, count, init_reward, halving_interval):
+    """Coins minted by blocks first..first+count-1 (1-based), as coord() mints them."""
+    if halving_interval <= 0:
+        return np.full(count, float(init_reward))
+    halvings = (np.arange(first, first + count, dtype=np.int64) - 1) // halving_interval
+    # Same sequence of float halvings as coord(): reward / 2 per halving
+    return np.where(halvings < MAX_HALVINGS, init_reward / np.exp2(np.minimum(halvings, MAX_HALVINGS)), 0.0)
+
+
+def fast_forward(num_nodes, miners, bt, diff0, blocks_limit, print_int, init_reward, halving_interval,
+                 metrics=None):
+    """Run blocks_limit transaction-free blocks; returns the same summary dict as coord()."""
+    th = sum(m.h for m in miners)
+    diff = diff0 if diff0 is not None else bt * th
+    retarget = diff0 is None
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    if metrics is None:
+        metrics = MetricsRegistry(capacity=blocks_limit // print_int + 2)
+    m_blocks, m_diff, m_abt, m_tps, m_infl, h_interval, _ = register_metrics(metrics, th)
+
+    # One tx (the coinbase) per block, delivered to every node
+    size = Block(0, 1, 0.0).size
+    now = 0.0
+    bc = 0
+    last_t = last_b = last_tx = last_coins = 0
+    last_infl = 0
+    la = 0.0
+
+    while bc < blocks_limit:
+        # Blocks until the next retarget (or a chunk), at the current difficulty
+        n = min(blocks_limit - bc, RETARGET_BLOCKS if retarget else CHUNK)
+        dts = rng.exponential(diff / th, n)
+        times = np.cumsum(np.concatenate(([now], dts)))[1:]
+        rewards = block_rewards(bc + 1, n, init_reward, halving_interval)
+        coins = np.cumsum(np.concatenate(([sim_globals.total_coins], rewards)))[1:]
+        h_interval.observe_many(dts)
+
+        # Samples every print_int blocks inside this chunk
+        for k in range((bc // print_int + 1) * print_int, bc + n + 1, print_int):
+            i = k - bc - 1
+            t = float(times[i])
+            sim_globals.total_tx = k
+            sim_globals.total_coins = float(coins[i])
+            sim_globals.io_requests = k * num_nodes
+            sim_globals.network_data = k * num_nodes * size
+            ti = t - last_t
+            dtx = k - last_tx
+            dcoins = sim_globals.total_coins - last_coins
+            m_blocks.value = k
+            m_diff.set(diff)
+            m_abt.set(ti / (k - last_b) if k - last_b else 0)
+            m_tps.set(dtx / ti if ti > 0 else 0)
+            m_infl.set((dcoins / last_coins) * (sim_globals.YEAR / ti) * 100 if last_coins > 0 else 0)
+            metrics.sample(t)
+            print_sum(t, k, blocks_limit, diff, th, metrics.latest())
+            last_t, last_b, last_tx, last_coins = t, k, k, sim_globals.total_coins
+            last_infl = m_infl.value
+
+        bc += n
+        now = float(times[-1])
+        sim_globals.total_tx = bc
+        sim_globals.total_coins = float(coins[-1])
+        sim_globals.io_requests = bc * num_nodes
+        sim_globals.network_data = bc * num_nodes * size
+
+        # Difficulty retarget after each full epoch, unless the run is over
+        if retarget and n == RETARGET_BLOCKS and bc < blocks_limit:
+            actual_avg = (now - la) / n
+            diff *= bt / actual_avg if actual_avg > 0 else 1
+            la = now
+
+    # Final summary, abt/tps over the whole run
+    m_blocks.value = bc
+    m_diff.set(diff)
+    m_infl.set(last_infl)
+    m_abt.set(now / bc if bc else 0)
+    m_tps.set(bc / now if now > 0 else 0)
+    metrics.sample(now)
+    return finish_run(now, bc, blocks_limit, diff, th, metrics.latest())
@@ -1,12 +1,17 @@
 import time
+from simulation.core.mempool import Mempool
 
 # Globals
 network_data = io_requests = total_tx = total_coins = 0
-pool = []
+pool = Mempool()
 HEADER_SIZE = 1024
 YEAR = 365 * 24 * 3600
 RADIUS = 6378 # earth radius in km
 start_time = time.time()
+trace = None  # TraceWriter when --trace is given
+relay = "push"  # block relay protocol (--relay)
+relay_stats = None  # RelayStats of the current gossip run
+uplink = "ideal"  # per-node uplink model (--uplink)
 
 # Danksharding globals
 danksharding_enabled = False
@@ -0,0 +1,227 @@
+"""
+Metrics registry: counters, gauges and histograms sampled into
+preallocated NumPy arrays at every reporting interval.
+
+Hot-path code keeps incrementing plain module globals (or a Counter's
+`value` attribute), which costs exactly a `+=`. The registry only reads
+them when sample() is called, once per print interval, and writes one row
+of the time series. Histograms buffer observations in a list and bin them
+with NumPy at sample time.
+
+    metrics = MetricsRegistry(capacity=100)
+    metrics.counter('total_tx', lambda: sim_globals.total_tx)
+    metrics.gauge('pool', lambda: len(sim_globals.pool))
+    dt = metrics.histogram('block_interval', np.geomspace(1e-3, 1e6, 91))
+    ...
+    dt.observe(b.dt)
+    metrics.sample(env.now)
+    ...
+    metrics.export('metrics.csv')   # or .json / .parquet
+"""
+import csv
+import json
+import os
+import numpy as np
+
+
+class Counter:
+    """Monotonic count. Either increment `value` directly or read it from `source`."""
+    __slots__ = ('name', 'value', 'source')
+
+    def __init__(self, name, source=None):
+        self.name = name
+        self.value = 0
+        self.source = source
+
+    def inc(self, n=1):
+        self.value += n
+
+    def read(self):
+        return self.source() if self.source is not None else self.value
+
+
+class Gauge:
+    """Point-in-time value: set() it, or read it from `source` at sample time."""
+    __slots__ = ('name', 'value', 'source')
+
+    def __init__(self, name, source=None):
+        self.name = name
+        self.value = 0.0
+        self.source = source
+
+    def set(self, value):
+        self.value = value
+
+    def read(self):
+        return self.source() if self.source is not None else self.value
+
+
+class Histogram:
+    """
+    Fixed-bin histogram. Values below the first edge or above the last
+    go to the first/last bin. The time series gets the cumulative count,
+    median and 90th percentile (bin midpoints) at each sample.
+    """
+
+    def __init__(self, name, edges):
+        self.name = name
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(self.edges.shape[0] - 1, dtype=np.int64)
+        self._pending = []
+
+    def observe(self, value):
+        self._pending.append(value)
+
+    def observe_many(self, values):
+        self._pending.extend(np.asarray(values, dtype=np.float64).ravel().tolist())
+
+    def flush(self):
+        if self._pending:
+            idx = np.searchsorted(self.edges, self._pending, side='right') - 1
+            np.clip(idx, 0, self.counts.shape[0] - 1, out=idx)
+            self.counts += np.bincount(idx, minlength=self.counts.shape[0])
+            self._pending = []
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantile(self, q):
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q * total))
+        return float((self.edges[i] + self.edges[i + 1]) / 2)
+
+    def columns(self):
+        return [f"{self.name}_count", f"{self.name}_p50", f"{self.name}_p90"]
+
+    def read(self):
+        self.flush()
+        return [self.count, self.quantile(0.5), self.quantile(0.9)]
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus their time series: one float64 row per sample,
+    one column per counter/gauge (three per histogram). The rows are
+    preallocated for `capacity` samples and doubled when full.
+    """
+
+    def __init__(self, capacity=1024):
+        self.metrics = []
+        self._by_name = {}
+        self.times = None
+        self.values = None
+        self.size = 0
+        self._capacity = max(1, capacity)
+
+    def _add(self, metric):
+        if metric.name in self._by_name:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        if self.size:
+            raise RuntimeError("Metrics must be registered before the first sample")
+        self.metrics.append(metric)
+        self._by_name[metric.name] = metric
+        return metric
+
+    def counter(self, name, source=None):
+        return self._add(Counter(name, source))
+
+    def gauge(self, name, source=None):
+        return self._add(Gauge(name, source))
+
+    def histogram(self, name, edges):
+        return self._add(Histogram(name, edges))
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    @property
+    def columns(self):
+        cols = []
+        for m in self.metrics:
+            cols.extend(m.columns() if isinstance(m, Histogram) else [m.name])
+        return cols
+
+    def _next_row(self, t):
+        if self.values is None:
+            self.times = np.empty(self._capacity, dtype=np.float64)
+            self.values = np.empty((self._capacity, len(self.columns)), dtype=np.float64)
+        if self.size == self.values.shape[0]:
+            self.times = np.concatenate([self.times, np.empty_like(self.times)])
+            self.values = np.concatenate([self.values, np.empty_like(self.values)])
+        self.times[self.size] = t
+        self.size += 1
+        return self.values[self.size - 1]
+
+    def sample_row(self, t, values):
+        """Append an already sampled row (restoring a checkpoint)."""
+        self._next_row(t)[:] = values
+
+    def sample(self, t):
+        """Record one row of every metric at simulated time t."""
+        row = self._next_row(t)
+        j = 0
+        for m in self.metrics:
+            v = m.read()
+            if isinstance(m, Histogram):
+                row[j:j + 3] = v
+                j += 3
+            else:
+                row[j] = v
+                j += 1
+
+    def series(self, name):
+        """Sampled values of one column (a view)."""
+        return self.values[:self.size, self.columns.index(name)]
+
+    def latest(self):
+        """Last sampled row as {column: value}, plus 'time'."""
+        if not self.size:
+            return {}
+        row = dict(zip(self.columns, self.values[self.size - 1].tolist()))
+        row['time'] = float(self.times[self.size - 1])
+        return row
+
+    def to_dict(self):
+        if self.values is None:
+            return {name: [] for name in ['time'] + self.columns}
+        values = self.values[:self.size]
+        out = {'time': self.times[:self.size].tolist()}
+        for j, name in enumerate(self.columns):
+            out[name] = values[:, j].tolist()
+        return out
+
+    @staticmethod
+    def check_export(path):
+        """Fail early, before a long run, if path cannot be exported to."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in ('.csv', '.json', '.parquet'):
+            raise ValueError(f"Unknown metrics format '{ext}'. Use .csv, .json or .parquet")
+        if ext == '.parquet':
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+        return ext
+
+    def export(self, path):
+        """Write the time series to path; the format follows the extension (.csv, .json, .parquet)."""
+        ext = self.check_export(path)
+        data = self.to_dict()
+        if ext == '.csv':
+            names = list(data)
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(names)
+                writer.writerows(zip(*(data[k] for k in names)))
+        elif ext == '.json':
+            histograms = {m.name: {'edges': m.edges.tolist(), 'counts': m.counts.tolist()}
+                          for m in self.metrics if isinstance(m, Histogram)}
+            with open(path, 'w') as f:
+                json.dump({'series': data, 'histograms': histograms}, f)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table(data), path)
@@ -1,35 +1,144 @@
+import json
+import os
 import random
-from simulation.utils.distance import calculate_distance
+import numpy as np
+from simulation.utils.distance import haversine_matrix
+
+BASE_LATENCY = 0.001
+LIGHT_SPEED_FIBER_KM_S = 200000
+JITTER_MAX = 0.002            # 0-2ms
+CONGESTION_RANGE = (1.0, 1.5)  # More stable network
+
+
+def load_locations():
+    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'network', 'locations.json')
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+class RegionLatency:
+    """
+    Latency model at region granularity.
+
+    Every node sits in one of the regions of the locations file, so the
+    distance and base propagation latency are computed once as a
+    region x region matrix and looked up by region index. Jitter and
+    congestion are drawn from NumPy in batches.
+    """
+
+    SAMPLE_BATCH = 4096
+
+    def __init__(self, locations, seed=None):
+        self.locations = locations
+        self.names = list(locations.keys())
+        self.index = {name: i for i, name in enumerate(self.names)}
+        lat = np.array([locations[n]["latitude"] for n in self.names], dtype=np.float64)
+        lon = np.array([locations[n]["longitude"] for n in self.names], dtype=np.float64)
+        self.coordinates = np.stack((lat, lon), axis=1)
+        self.distance_km = haversine_matrix(lat, lon)
+        self.base = BASE_LATENCY + self.distance_km / LIGHT_SPEED_FIBER_KM_S
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.rng = np.random.default_rng(seed)
+        self._pos = self.SAMPLE_BATCH  # force a refill on first draw
+
+    def _refill(self):
+        self._jitter = self.rng.uniform(0, JITTER_MAX, self.SAMPLE_BATCH)
+        self._congestion = self.rng.uniform(*CONGESTION_RANGE, self.SAMPLE_BATCH)
+        self._pos = 0
+
+    def fork(self, seed=None):
+        """Same regions and base latencies (shared, read-only) with its own generator."""
+        other = object.__new__(type(self))
+        for k in ('locations', 'names', 'index', 'coordinates', 'distance_km', 'base'):
+            setattr(other, k, getattr(self, k))
+        other.seed(seed)
+        return other
+
+    def get_state(self):
+        """Generator state plus the unread part of the sample buffer, for checkpoints."""
+        state = {'rng': self.rng.bit_generator.state, 'pos': self._pos}
+        if self._pos < self.SAMPLE_BATCH:
+            state['jitter'] = self._jitter
+            state['congestion'] = self._congestion
+        return state
+
+    def set_state(self, state):
+        self.rng = np.random.default_rng()
+        self.rng.bit_generator.state = state['rng']
+        self._pos = state['pos']
+        if self._pos < self.SAMPLE_BATCH:
+            self._jitter = state['jitter']
+            self._congestion = state['congestion']
+
+    def sample(self, base):
+        """One latency draw on top of a deterministic base latency."""
+        if self._pos >= self.SAMPLE_BATCH:
+            self._refill()
+        i = self._pos
+        self._pos += 1
+        return max(float((base + self._jitter[i]) * self._congestion[i]), 0.001)
+
+    def sample_many(self, base):
+        """Vectorized latency draws for an array of base latencies."""
+        base = np.asarray(base, dtype=np.float64)
+        jitter = self.rng.uniform(0, JITTER_MAX, base.shape)
+        congestion = self.rng.uniform(*CONGESTION_RANGE, base.shape)
+        return np.maximum((base + jitter) * congestion, 0.001)
+
+    def region_of(self, location):
+        return self.index[location]
+
+
+_region_latency = None
+
+
+def get_region_latency():
+    global _region_latency
+    if _region_latency is None:
+        _region_latency = RegionLatency(load_locations())
+    return _region_latency
+
+
+def set_region_latency(latency):
+    """Install the process-wide RegionLatency; returns the previous one."""
+    global _region_latency
+    previous, _region_latency = _region_latency, latency
+    return previous
 
-_distance_cache = {}
 
 def calculate_network_latency(node1, node2):
-    cache_key = (node1.id, node2.id) if node1.id < node2.id else (node2.id, node1.id)
-    
-    if cache_key not in _distance_cache:
-        distance_km = calculate_distance(node1, node2)
-        _distance_cache[cache_key] = distance_km
-    else:
-        distance_km = _distance_cache[cache_key]
-
-    
-    base_latency = 0.001
-    light_speed_fiber_km_s = 200000
-    propagation_delay = distance_km / light_speed_fiber_km_s
-    
-    jitter = random.uniform(0, 0.002)  # 0-2m
-    
-    congestion_factor = random.uniform(1.0, 1.5)  # More stable network
-    
-    total_latency = (base_latency + propagation_delay + jitter) * congestion_factor
-    
-    return max(total_latency, 0.001)
+    regions = get_region_latency()
+    return regions.sample(regions.base[node1.region, node2.region])
+
 
 def calculate_transmission_time(block_size, bandwidth_bps):
     tcp_overhead = 1.1
     effective_size = block_size * tcp_overhead
-    
+
     transmission_time = effective_size / bandwidth_bps
-    
+
     variation = random.uniform(0.9, 1.1)
-    return transmission_time * variation
\ No newline at end of file
+    return transmission_time * variation
+
+
+def calculate_transmission_times(block_size, bandwidth_bps, count, rng):
+    """Vectorized calculate_transmission_time() for `count` transfers."""
+    tcp_overhead = 1.1
+    transmission_time = block_size * tcp_overhead / bandwidth_bps
+    return transmission_time * rng.uniform(0.9, 1.1, count)
+
+
+def time_scale(blocktime):
+    # Fast chains run their network 10x faster
+    return 0.1 if blocktime < 300 else 1.0
+
+
+def bound_delay(total_delay, blocktime):
+    total_delay = total_delay * time_scale(blocktime)
+
+    # Ensure delay is always positive (Danksharding can cause timing issues)
+    return np.maximum(0.001, total_delay)
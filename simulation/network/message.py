@@ -1,3 +1,7 @@
+import simulation.globals as sim_globals
+
+TX_SIZE = 250  # bytes per transaction on the wire
+
 class NetworkMessage:
     
     def __init__(self, msg_type, sender_id, data=None):
@@ -11,7 +15,7 @@ class NetworkMessage:
             'announce': 37,     # I have a new block message 36 bytes hash + 1 byte type
             'request': 37,      # Send request message for block
             'block': getattr(self.data, 'size', 1000000),  # Block sending
-            'transaction': 250, # Transaction
+            'transaction': TX_SIZE, # Transaction
             'peers': 30,        # Address sharing
             'ping': 8,          # Connection test
             'pong': 8           # Ping response
@@ -35,3 +39,28 @@ class BlockMessage(NetworkMessage):
         super().__init__('block', sender_id, block)
         self.block = block
         self.size = block.size
+
+class CompactBlockMessage(NetworkMessage):
+    # Header, a 6-byte short id per transaction and the prefilled coinbase
+    SHORT_ID_SIZE = 6
+
+    def __init__(self, sender_id, block):
+        super().__init__('compact', sender_id, block)
+        self.block = block
+        self.size = sim_globals.HEADER_SIZE + max(block.tx - 1, 0) * self.SHORT_ID_SIZE + TX_SIZE
+
+class BlockTxnRequestMessage(NetworkMessage):
+    # getblocktxn: block hash plus one index per missing transaction
+    def __init__(self, sender_id, block_id, missing):
+        super().__init__('request', sender_id)
+        self.block_id = block_id
+        self.missing = missing
+        self.size = 37 + 2 * missing
+
+class BlockTxnMessage(NetworkMessage):
+    # blocktxn: the missing transactions in full
+    def __init__(self, sender_id, block_id, missing):
+        super().__init__('transaction', sender_id)
+        self.block_id = block_id
+        self.missing = missing
+        self.size = missing * TX_SIZE
@@ -0,0 +1,400 @@
+"""
+--propagation pdes: block gossip as a conservative parallel discrete-event
+simulation over worker processes.
+
+Nodes are partitioned by region (whole regions per partition while there
+are at least as many regions as partitions). Each partition runs in its
+own process with its own event heap, seen-sets and latency generator and
+executes exactly the gossip of Node.receive(): the source hands the block
+to its neighbors at once, every other node relays its first copy to all
+neighbors after its per-edge delays, and duplicates are dropped.
+
+Time advances in global windows [gvt, gvt + lookahead), where gvt is the
+earliest pending event anywhere and the lookahead is the smallest delay
+any cross-partition edge can draw (the base latency between their
+regions, bounded as in Node._bound_delay()). Whatever a partition sends
+across during a window is therefore due after it ends. Cross-partition
+deliveries are written in one batch per window into the sender's
+shared-memory outbox (two, alternating between windows) and read by the
+receivers at the start of the next one; only offsets go over the pipes.
+Incoming batches are ordered by (time, sender partition), so a run is
+deterministic for a fixed seed and partition count.
+
+coord() calls advance() before every new block and at the end of the run,
+so counters and traces see the same deliveries as with in-process gossip.
+"""
+import heapq
+import multiprocessing
+import os
+import random
+from multiprocessing import shared_memory
+import numpy as np
+
+import simulation.globals as sim_globals
+from .latency import get_region_latency, bound_delay, JITTER_MAX, CONGESTION_RANGE
+
+# One cross-partition delivery
+EVENT = np.dtype([('t', 'f8'), ('node', 'i4'), ('sender', 'i4'), ('block', 'i8')])
+
+# Per-window counters a partition reports
+STATS = ('io_requests', 'network_data', 'deliveries', 'blobs', 'blob_data', 'events')
+
+
+def partition_nodes(regions, parts):
+    """
+    Partition index of every node. Whole regions are assigned greedily to
+    the lightest partition; with more partitions than regions, each region
+    gets partitions in proportion to its size and is split by node id.
+    """
+    regions = np.asarray(regions)
+    present, counts = np.unique(regions, return_counts=True)
+    part = np.zeros(regions.shape[0], dtype=np.int16)
+    if parts <= present.shape[0]:
+        load = np.zeros(parts, dtype=np.int64)
+        for k in np.argsort(-counts, kind='stable'):
+            p = int(np.argmin(load))
+            part[regions == present[k]] = p
+            load[p] += counts[k]
+        return part
+    # Largest remainder: at least one partition per region
+    share = 1 + (parts - present.shape[0]) * counts / counts.sum()
+    alloc = np.floor(share).astype(np.int64)
+    for k in np.argsort(-(share - alloc), kind='stable')[:parts - alloc.sum()]:
+        alloc[k] += 1
+    first = 0
+    for r, k in zip(present, alloc):
+        ids = np.flatnonzero(regions == r)
+        for j, chunk in enumerate(np.array_split(ids, k)):
+            part[chunk] = first + j
+        first += k
+    return part
+
+
+def lookahead(regions, part, blocktime):
+    """Lower bound of the delay on any edge between two partitions (np.inf with one partition)."""
+    regions = np.asarray(regions)
+    base = get_region_latency().base.astype(np.float32).astype(np.float64)  # edges store float32
+    pairs = np.unique(np.stack((regions, part)).T, axis=0)
+    best = np.inf
+    for a, p in pairs:
+        for b, q in pairs:
+            if p != q:
+                best = min(best, float(bound_delay(base[a, b], blocktime)))
+    return best
+
+
+def _share(arrays):
+    """Copy named arrays into one shared-memory segment; returns it and the layout."""
+    layout, offset = [], 0
+    for name, a in arrays.items():
+        offset = -(-offset // 8) * 8
+        layout.append((name, a.dtype.str, a.shape, offset))
+        offset += a.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, off), a in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)[...] = a
+    return shm, layout
+
+
+def _attach(name, layout):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, {k: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off) for k, dtype, shape, off in layout}
+
+
+class _Outbox:
+    """A partition's cross-partition deliveries of one window, in shared memory."""
+
+    def __init__(self):
+        self.shm = None
+        self.capacity = 0
+
+    def write(self, events):
+        if events.shape[0] > self.capacity:
+            self.close()
+            self.capacity = max(events.shape[0], 2 * self.capacity, 4096)
+            self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * EVENT.itemsize)
+        np.ndarray(events.shape, dtype=EVENT, buffer=self.shm.buf)[:] = events
+        return self.shm.name
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class _Partition:
+    """Worker side: the gossip of one partition's nodes."""
+
+    def __init__(self, p, arrays, blocktime, seed):
+        from ..core.seen import SeenBlocks
+        self.p = p
+        self.indptr = arrays['indptr']
+        self.indices = arrays['indices']
+        self.edge_base = arrays['edge_base']
+        self.bandwidth_bps = arrays['bandwidth_mbps'].astype(np.float64) * 1024 * 1024
+        self.part = arrays['part']
+        self.blocktime = blocktime
+        self.rng = np.random.default_rng(seed)
+        owned = np.flatnonzero(self.part == p)
+        self.local = np.full(self.part.shape[0], -1, dtype=np.int64)
+        self.local[owned] = np.arange(owned.shape[0])
+        self.seen = [SeenBlocks() for _ in range(owned.shape[0])]
+        self.heap = []
+        self.seq = 0
+        self.blocks = {}  # id -> (size, blobs, blob bytes)
+        self.outboxes = (_Outbox(), _Outbox())
+        self.attached = {}
+
+    def _delays(self, v, lo, hi, size):
+        # Node._edge_delays() and _delayed_propagation() for the edges of node v
+        count = hi - lo
+        latency = np.maximum((self.edge_base[lo:hi] + self.rng.uniform(0, JITTER_MAX, count))
+                             * self.rng.uniform(*CONGESTION_RANGE, count), 0.001)
+        transmission = size * 1.1 / self.bandwidth_bps[v] * self.rng.uniform(0.9, 1.1, count)
+        return np.maximum(0.001, bound_delay(latency + transmission, self.blocktime))
+
+    def _read(self, refs):
+        # Incoming batches from the other partitions' outboxes
+        names = {name for name, _, _ in refs}
+        for name in list(self.attached):
+            if name not in names:
+                self.attached.pop(name).close()
+        batches = []
+        for name, start, count in refs:
+            shm = self.attached.get(name)
+            if shm is None:
+                shm = self.attached[name] = shared_memory.SharedMemory(name=name)
+            batches.append(np.ndarray((start + count,), dtype=EVENT, buffer=shm.buf)[start:].copy())
+        return batches
+
+    def window(self, number, end, inject, blocks, refs, record):
+        self.blocks.update(blocks)
+        incoming = self._read(refs)
+        if inject is not None:
+            incoming.insert(0, inject)
+        if incoming:
+            events = np.concatenate(incoming)
+            for e in events[np.argsort(events['t'], kind='stable')].tolist():
+                heapq.heappush(self.heap, (e[0], self.seq, e[1], e[2], e[3]))
+                self.seq += 1
+
+        stats = dict.fromkeys(STATS, 0)
+        out = []
+        arrivals = [] if record else None
+        heap, part, local, seen, p = self.heap, self.part, self.local, self.seen, self.p
+        while heap and heap[0][0] < end:
+            t, _, v, sender, bid = heapq.heappop(heap)
+            size, nblobs, blob_bytes = self.blocks[bid]
+            stats['events'] += 1
+            stats['deliveries'] += 1
+            stats['blobs'] += nblobs
+            stats['blob_data'] += blob_bytes
+            s = seen[local[v]]
+            if bid in s:
+                continue
+            s.add(bid)
+            stats['io_requests'] += 1
+            stats['network_data'] += size
+            if record:
+                arrivals.append((bid, v, t))
+            if sender < 0:
+                continue  # the source: its neighbors were handed the block with it
+            lo, hi = int(self.indptr[v]), int(self.indptr[v + 1])
+            nb = self.indices[lo:hi]
+            due = t + self._delays(v, lo, hi, size)
+            mine = part[nb] == p
+            for w, tw in zip(nb[mine].tolist(), due[mine].tolist()):
+                if bid in seen[local[w]]:
+                    # Already seen here: only the duplicate's blob verification counts
+                    stats['deliveries'] += 1
+                    stats['blobs'] += nblobs
+                    stats['blob_data'] += blob_bytes
+                    continue
+                heapq.heappush(heap, (tw, self.seq, w, v, bid))
+                self.seq += 1
+            if not mine.all():
+                ev = np.empty(int((~mine).sum()), dtype=EVENT)
+                ev['t'] = due[~mine]
+                ev['node'] = nb[~mine]
+                ev['sender'] = v
+                ev['block'] = bid
+                out.append(ev)
+
+        # Cross-partition deliveries grouped by destination
+        if out:
+            events = np.concatenate(out)
+            if events['t'].min() < end:
+                raise RuntimeError(f"Partition {p}: cross-partition delivery inside the lookahead window")
+            dest = part[events['node']]
+            order = np.argsort(dest, kind='stable')
+            events = events[order]
+            counts = np.bincount(dest[order], minlength=int(part.max()) + 1)
+            name = self.outboxes[number % 2].write(events)
+            first_due = float(events['t'].min())
+        else:
+            counts, name, first_due = None, None, np.inf
+        next_t = heap[0][0] if heap else np.inf
+        return next_t, first_due, name, counts, stats, arrivals
+
+    def close(self):
+        for shm in self.attached.values():
+            shm.close()
+        for box in self.outboxes:
+            box.close()
+
+
+def _partition_worker(p, shm_name, layout, blocktime, seed, conn):
+    shm, arrays = _attach(shm_name, layout)
+    partition = _Partition(p, arrays, blocktime, seed)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == 'close':
+                break
+            try:
+                conn.send(('ok',) + partition.window(*msg[1:]))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+                break
+    finally:
+        partition.close()
+        del arrays
+        shm.close()
+        conn.close()
+
+
+class PartitionedGossip:
+    """
+    Parent side: owns the topology segment and the partition processes,
+    injects blocks and advances all partitions window by window.
+    """
+
+    def __init__(self, topology, regions, bandwidth_mbps, blocktime, partitions=None):
+        regions = np.asarray(regions)
+        if partitions is None:
+            partitions = os.cpu_count() or 1
+        self.partitions = max(1, min(int(partitions), regions.shape[0]))
+        self.part = partition_nodes(regions, self.partitions)
+        self.lookahead = lookahead(regions, self.part, blocktime)
+        self.topology = topology
+        self.windows = 0
+        self.cross = 0
+        self.deliveries = 0  # duplicates included
+        self.events = np.zeros(self.partitions, dtype=np.int64)  # heap events processed per partition
+        src = np.repeat(regions, np.diff(topology.indptr))
+        edge_base = get_region_latency().base[src, regions[topology.indices]].astype(np.float32)
+        self.shm, layout = _share({'indptr': topology.indptr, 'indices': topology.indices,
+                                   'edge_base': edge_base,
+                                   'bandwidth_mbps': np.asarray(bandwidth_mbps, dtype=np.float32),
+                                   'part': self.part})
+
+        ctx = multiprocessing.get_context()
+        self.conns, self.procs = [], []
+        for p in range(self.partitions):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_partition_worker,
+                               args=(p, self.shm.name, layout, blocktime, random.getrandbits(64), child))
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+        self.next_t = [np.inf] * self.partitions
+        self.refs = [[] for _ in range(self.partitions)]  # outbox slices addressed to each partition
+        self.first_due = np.inf
+        self.inject_events = [[] for _ in range(self.partitions)]
+        self.new_blocks = {}
+
+    @property
+    def sizes(self):
+        return np.bincount(self.part, minlength=self.partitions)
+
+    def inject(self, block, source, t):
+        """Hand `block` to node `source` at time t (and, from it, to its neighbors)."""
+        nb = self.topology.neighbors_of(source)
+        ev = np.empty(nb.shape[0] + 1, dtype=EVENT)
+        ev['t'] = t
+        ev['node'][0], ev['node'][1:] = source, nb
+        ev['sender'][0], ev['sender'][1:] = -1, source
+        ev['block'] = block.id
+        dest = self.part[ev['node']]
+        for p in np.unique(dest).tolist():
+            self.inject_events[p].append(ev[dest == p])
+        blobs = len(block.blobs) if sim_globals.danksharding_enabled else 0
+        blob_bytes = sum(b.size for b in block.blobs) if blobs else 0
+        self.new_blocks[block.id] = (block.size, blobs, blob_bytes)
+
+    def _gvt(self):
+        pending = [float(e['t'].min()) for evs in self.inject_events for e in evs]
+        return min(min(self.next_t), self.first_due, min(pending, default=np.inf))
+
+    def advance(self, until):
+        """Process every delivery due before `until` in all partitions."""
+        while True:
+            gvt = self._gvt()
+            if gvt >= until:
+                return
+            end = min(until, gvt + self.lookahead)
+            record = sim_globals.trace is not None
+            for p, conn in enumerate(self.conns):
+                inject = np.concatenate(self.inject_events[p]) if self.inject_events[p] else None
+                conn.send(('window', self.windows, end, inject, self.new_blocks, self.refs[p], record))
+                self.inject_events[p] = []
+            self.new_blocks = {}
+            self.windows += 1
+
+            refs = [[] for _ in range(self.partitions)]
+            self.first_due = np.inf
+            for p, conn in enumerate(self.conns):
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    raise RuntimeError(f"PDES partition {p} exited") from None
+                if msg[0] == 'error':
+                    raise RuntimeError(f"PDES partition {p} failed: {msg[1]}")
+                _, self.next_t[p], first_due, name, counts, stats, arrivals = msg
+                self.first_due = min(self.first_due, first_due)
+                if counts is not None:
+                    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                    for q in np.flatnonzero(counts).tolist():
+                        refs[q].append((name, int(starts[q]), int(counts[q])))
+                    self.cross += int(counts.sum())
+                self.events[p] += stats['events']
+                self.deliveries += stats['deliveries']
+                sim_globals.io_requests += stats['io_requests']
+                sim_globals.network_data += stats['network_data']
+                sim_globals.total_blobs_processed += stats['blobs']
+                sim_globals.total_blob_data += stats['blob_data']
+                if arrivals:
+                    self._record(arrivals)
+            self.refs = refs
+
+    def _record(self, arrivals):
+        a = np.array(arrivals)
+        for bid in np.unique(a[:, 0]).tolist():
+            rows = a[a[:, 0] == bid]
+            sim_globals.trace.arrivals_many(int(bid), rows[:, 1].astype(np.int64), rows[:, 2])
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(('close',))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        for conn in self.conns:
+            conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+    def report(self):
+        sizes = "/".join(str(int(s)) for s in self.sizes)
+        window = f"lookahead {self.lookahead * 1000:.1f} ms" if np.isfinite(self.lookahead) else "no lookahead"
+        return (f"PDES: {self.partitions} partitions ({sizes} nodes), {window}, "
+                f"{self.windows:,} windows, {self.deliveries:,} deliveries ({self.cross:,} cross-partition), "
+                f"events per partition {'/'.join(str(int(e)) for e in self.events)}")
@@ -0,0 +1,100 @@
+"""
+Block relay protocols for gossip propagation (--relay):
+
+    push      every node sends the full block to every neighbor
+              (duplicates are dropped on arrival)
+    inv       announce / getdata / block: a node announces a new block to
+              its neighbors and sends it only to those that request it
+    compact   compact blocks (BIP 152, high-bandwidth mode): the header and
+              short transaction ids go to every neighbor, which rebuild the
+              block from their mempool and fetch only missing transactions
+
+RelayStats collects, per block, the bytes every protocol message puts on
+the wire and the first-arrival delay at each node, so the protocols can be
+compared on bytes per block and propagation percentiles.
+"""
+import numpy as np
+
+import simulation.globals as sim_globals
+
+RELAY_PROTOCOLS = ("push", "inv", "compact")
+
+# A transaction is in a node's mempool once it arrived this long before the block
+TX_RELAY_DELAY = 2.0
+
+
+class RelayStats:
+    """Wire bytes and first-arrival delays per block, summarized a few blocks behind the newest."""
+
+    OPEN_BLOCKS = 16
+
+    def __init__(self, protocol, nodes=None):
+        self.protocol = protocol
+        self.nodes = nodes
+        self.open = {}  # block id -> [origin time, arrival times]
+        self.closed_below = 0
+        self.bytes = 0
+        self.blocks = 0
+        self.median = self.p90 = self.full = self.coverage = 0.0
+
+    def sent(self, block_id, nbytes):
+        self.bytes += nbytes
+
+    def arrival(self, block_id, t):
+        entry = self.open.get(block_id)
+        if entry is None:
+            if block_id < self.closed_below:
+                return
+            # The first arrival is the source receiving the block from coord()
+            entry = self.open[block_id] = [t, []]
+            if len(self.open) > self.OPEN_BLOCKS:
+                self._close(min(self.open))
+        entry[1].append(t - entry[0])
+
+    def _close(self, block_id):
+        _, delays = self.open.pop(block_id)
+        self.closed_below = max(self.closed_below, block_id + 1)
+        delays = np.array(delays)
+        total = self.nodes or sim_globals.total_nodes
+        self.blocks += 1
+        self.median += float(np.median(delays))
+        self.p90 += float(np.percentile(delays, 90))
+        self.full += float(delays.max())  # over the nodes reached; reachability is in coverage
+        self.coverage += delays.shape[0] / total
+
+    def get_state(self):
+        """JSON-serializable totals and open blocks, for checkpoints."""
+        return {'protocol': self.protocol, 'bytes': self.bytes, 'blocks': self.blocks,
+                'median': self.median, 'p90': self.p90, 'full': self.full, 'coverage': self.coverage,
+                'closed_below': self.closed_below,
+                'open': [[block_id, origin, delays] for block_id, (origin, delays) in self.open.items()]}
+
+    def set_state(self, state):
+        self.bytes = state['bytes']
+        self.blocks = state['blocks']
+        self.median, self.p90, self.full = state['median'], state['p90'], state['full']
+        self.coverage = state['coverage']
+        self.closed_below = state['closed_below']
+        self.open = {block_id: [origin, list(delays)] for block_id, origin, delays in state['open']}
+
+    def summary(self):
+        """Close every open block and return the per-block averages."""
+        for block_id in sorted(self.open):
+            self._close(block_id)
+        n = self.blocks or 1
+        return {
+            'relay': self.protocol,
+            'relay_bytes_per_block': self.bytes / n,
+            'relay_median': self.median / n,
+            'relay_p90': self.p90 / n,
+            'relay_full': self.full / n,
+            'relay_coverage': self.coverage / n,
+        }
+
+
+def missing_transactions(block, now):
+    """Transactions of `block` not yet in a node's mempool at `now` (compact relay)."""
+    times = getattr(block, 'tx_times', None)
+    if times is None or not len(times):
+        return 0
+    return int(np.count_nonzero(times > now - TX_RELAY_DELAY))
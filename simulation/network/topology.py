@@ -0,0 +1,208 @@
+import random
+import numpy as np
+
+# Default shape parameters for the generators
+SMALL_WORLD_REWIRE = 0.1
+GEO_LOCALITY = 0.5
+
+
+def _rng(rng):
+    if rng is None:
+        return np.random.default_rng(random.getrandbits(64))
+    return rng
+
+
+class Topology:
+    """
+    Directed adjacency in compressed sparse row form: the neighbors of node
+    i are indices[indptr[i]:indptr[i + 1]]. Undirected generators store
+    both directions.
+    """
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+
+    @classmethod
+    def from_edges(cls, n, src, dst):
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int32)
+        order = np.argsort(src, kind='stable')
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(indptr, dst[order])
+
+    @property
+    def num_nodes(self):
+        return self.indptr.shape[0] - 1
+
+    @property
+    def num_edges(self):
+        return self.indices.shape[0]
+
+    def degree(self, i=None):
+        if i is None:
+            return np.diff(self.indptr)
+        return int(self.indptr[i + 1] - self.indptr[i])
+
+    def neighbors_of(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def attach(self, nodes):
+        """Point every node's neighbors at its slice of the adjacency arrays (node i is nodes[i])."""
+        if hasattr(nodes, 'set_topology'):
+            nodes.set_topology(self)
+            return
+        for i, node in enumerate(nodes):
+            node.neighbors = NeighborView(nodes, self.neighbors_of(i))
+
+
+class NeighborView:
+    """Read-only sequence of Node objects over a slice of Topology.indices."""
+
+    __slots__ = ('_nodes', 'ids')
+
+    def __init__(self, nodes, ids):
+        self._nodes = nodes
+        self.ids = ids
+
+    def __len__(self):
+        return self.ids.shape[0]
+
+    def __iter__(self):
+        nodes = self._nodes
+        for i in self.ids.tolist():
+            yield nodes[i]
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self._nodes[i] for i in self.ids[k].tolist()]
+        return self._nodes[int(self.ids[k])]
+
+
+def _dedupe(n, src, dst):
+    # Drop self-loops and repeated edges
+    keep = src != dst
+    src, dst = src[keep], dst[keep]
+    key = np.unique(src.astype(np.int64) * n + dst)
+    return key // n, key % n
+
+
+def _symmetric(n, src, dst):
+    src, dst = _dedupe(n, np.concatenate((src, dst)), np.concatenate((dst, src)))
+    return Topology.from_edges(n, src, dst)
+
+
+def random_k_out(n, k, rng=None):
+    """Every node links to k distinct random peers (the original random.sample() topology)."""
+    rng = _rng(rng)
+    k = min(k, n - 1)
+    if k <= 0:
+        return Topology(np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+    # Draw from [0, n-1) and skip over self, then redraw rows that repeat a peer
+    picks = rng.integers(0, n - 1, size=(n, k))
+    rows = np.arange(n)
+    bad = rows
+    while bad.shape[0]:
+        if bad is not rows:
+            picks[bad] = rng.integers(0, n - 1, size=(bad.shape[0], k))
+        s = np.sort(picks[bad], axis=1)
+        dup = (s[:, 1:] == s[:, :-1]).any(axis=1)
+        bad = bad[dup]
+        if bad.shape[0] and k * k > n:
+            # Dense graphs: sample without replacement row by row
+            for i in bad.tolist():
+                picks[i] = rng.choice(n - 1, k, replace=False)
+            break
+    picks += picks >= rows[:, None]
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int64)
+    return Topology(indptr, picks.ravel())
+
+
+def random_regular(n, k, rng=None):
+    """Undirected (near-)k-regular graph from the configuration model; self-loops and multi-edges are dropped."""
+    rng = _rng(rng)
+    stubs = np.repeat(np.arange(n, dtype=np.int64), k)
+    if stubs.shape[0] % 2:
+        stubs = stubs[:-1]
+    rng.shuffle(stubs)
+    return _symmetric(n, stubs[0::2], stubs[1::2])
+
+
+def small_world(n, k, p=SMALL_WORLD_REWIRE, rng=None):
+    """Watts-Strogatz ring lattice with k nearest neighbors, each edge rewired with probability p."""
+    rng = _rng(rng)
+    half = max(k // 2, 1)
+    src = np.repeat(np.arange(n, dtype=np.int64), half)
+    dst = (src + np.tile(np.arange(1, half + 1), n)) % n
+    rewire = rng.random(dst.shape[0]) < p
+    dst[rewire] = rng.integers(0, n, size=int(rewire.sum()))
+    return _symmetric(n, src, dst)
+
+
+def scale_free(n, m, rng=None):
+    """Barabasi-Albert preferential attachment, m links per new node."""
+    rng = _rng(rng)
+    m = max(1, min(m, n - 1))
+    # Every endpoint ever added, so uniform picks from it are degree-proportional
+    ends = np.empty(2 * m * n, dtype=np.int64)
+    src = np.empty(m * n, dtype=np.int64)
+    dst = np.empty(m * n, dtype=np.int64)
+    ends[:m] = np.arange(m)
+    filled = m
+    e = 0
+    for v in range(m, n):
+        targets = np.unique(ends[rng.integers(0, filled, size=m)])
+        t = targets.shape[0]
+        src[e:e + t] = v
+        dst[e:e + t] = targets
+        e += t
+        ends[filled:filled + t] = targets
+        ends[filled + t:filled + 2 * t] = v
+        filled += 2 * t
+    return _symmetric(n, src[:e], dst[:e])
+
+
+def geographic(n, k, regions, locality=GEO_LOCALITY, rng=None):
+    """
+    k-out graph biased towards peers in the same region: about
+    locality * k links stay inside the node's region, the rest are random.
+    """
+    rng = _rng(rng)
+    regions = np.asarray(regions)
+    base = random_k_out(n, k, rng)
+    picks = base.indices.reshape(n, -1).astype(np.int64) if base.num_edges else np.zeros((n, 0), dtype=np.int64)
+    k = picks.shape[1]
+    k_local = int(round(k * locality))
+    if k_local == 0:
+        return base
+    order = np.argsort(regions, kind='stable')
+    counts = np.bincount(regions)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    size = counts[regions]
+    # Random members of the node's own region (regions with one node keep their random links)
+    local = order[starts[regions][:, None] + rng.integers(0, np.maximum(size, 1)[:, None], size=(n, k_local))]
+    ok = (size > 1)[:, None] & (local != np.arange(n)[:, None])
+    picks[:, :k_local] = np.where(ok, local, picks[:, :k_local])
+    src = np.repeat(np.arange(n, dtype=np.int64), k)
+    src, dst = _dedupe(n, src, picks.ravel())
+    return Topology.from_edges(n, src, dst)
+
+
+GENERATORS = ('k-out', 'regular', 'small-world', 'scale-free', 'geo')
+
+
+def build_topology(kind, n, k, rng=None, regions=None):
+    if kind == 'k-out':
+        return random_k_out(n, k, rng)
+    if kind == 'regular':
+        return random_regular(n, k, rng)
+    if kind == 'small-world':
+        return small_world(n, k, rng=rng)
+    if kind == 'scale-free':
+        return scale_free(n, max(k // 2, 1), rng)
+    if kind == 'geo':
+        if regions is None:
+            raise ValueError("Geographic topology needs node regions")
+        return geographic(n, k, regions, rng=rng)
+    raise ValueError(f"Unknown topology '{kind}'. Available topologies: {', '.join(GENERATORS)}")
@@ -0,0 +1,110 @@
+"""
+Per-node uplink with processor sharing (--uplink shared).
+
+Without it every transfer takes size / bandwidth as if the link were
+idle, so a node relaying a block to all its neighbors uploads every copy
+in the time of one. An Uplink instead splits the node's bandwidth equally
+among its concurrent sends (fluid flow): with n active flows each one is
+served at 1/n of the link.
+
+Progress is kept in virtual time, the work (seconds at full rate) every
+active flow has received so far, which grows at rate 1/n. A flow of work
+w started at virtual time v finishes when the virtual time reaches
+v + w, so flows sit in a heap keyed by that finish tag and an arrival or
+a completion costs one heap operation, O(log k) for k active flows,
+instead of rescheduling every flow. The uplink keeps at most one SimPy
+wakeup pending, for the earliest finish.
+"""
+import heapq
+
+# Finish tags this close to the virtual time count as done (float rounding)
+EPSILON = 1e-12
+
+
+class Uplink:
+    """Processor-sharing uplink of one node; callbacks run as their sends complete."""
+
+    __slots__ = ('env', 'vtime', 'last', 'flows', 'seq', 'wake_at', 'busy', 'peak', 'sent')
+
+    def __init__(self, env):
+        self.env = env
+        self.vtime = 0.0
+        self.last = env.now
+        self.flows = []  # heap of (finish tag, seq, callback, arg)
+        self.seq = 0
+        self.wake_at = None
+        self.busy = 0.0  # time with at least one active flow
+        self.peak = 0
+        self.sent = 0
+
+    def _advance(self):
+        now = self.env.now
+        if self.flows:
+            self.vtime += (now - self.last) / len(self.flows)
+            self.busy += now - self.last
+        self.last = now
+
+    def send(self, work, callback, arg=None):
+        """Start a transfer needing `work` seconds of the idle link; callback(arg) when done."""
+        self.send_many((work,), callback, (arg,))
+
+    def send_many(self, works, callback, args):
+        """Start one transfer per (work, arg) pair at once."""
+        self._advance()
+        for work, arg in zip(works, args):
+            heapq.heappush(self.flows, (self.vtime + work, self.seq, callback, arg))
+            self.seq += 1
+            self.sent += 1
+        self.peak = max(self.peak, len(self.flows))
+        self._schedule()
+
+    def _schedule(self):
+        if not self.flows:
+            return
+        at = self.last + (self.flows[0][0] - self.vtime) * len(self.flows)
+        # Arrivals only delay the earliest finish, so a pending earlier wakeup suffices
+        if self.wake_at is not None and self.wake_at <= at:
+            return
+        self.wake_at = at
+        self.env.timeout(max(at - self.env.now, 0.0)).callbacks.append(self._wake)
+
+    def _wake(self, event):
+        if self.wake_at is not None and self.env.now >= self.wake_at:
+            self.wake_at = None
+        self._advance()
+        done = []
+        now = self.env.now
+        while self.flows:
+            tag = self.flows[0][0]
+            # Done by virtual time, or due now once the remaining work is below the
+            # resolution of env.now (at large times that gap never closes otherwise)
+            if tag > self.vtime + EPSILON and self.last + (tag - self.vtime) * len(self.flows) > now:
+                break
+            self.vtime = max(self.vtime, tag)
+            done.append(heapq.heappop(self.flows))
+        if not self.flows:
+            self.vtime = 0.0
+        self._schedule()
+        for _, _, callback, arg in done:
+            callback(arg)
+
+
+def uplinks_of(nodes):
+    """The Uplinks that carried traffic: NodeTable keeps them by id, Node objects one each."""
+    table = getattr(nodes, 'uplinks', None)
+    if table is not None:
+        return list(table.values())
+    return [n._uplink for n in nodes if n._uplink is not None]
+
+
+def uplink_stats(nodes, sim_time):
+    """Peak concurrent sends and link busy fractions over the nodes that sent anything."""
+    links = uplinks_of(nodes)
+    if not links or sim_time <= 0:
+        return {'uplink_peak': 0, 'uplink_busy': 0.0, 'uplink_busy_max': 0.0}
+    busy = [u.busy / sim_time for u in links]
+    return {
+        'uplink_peak': max(u.peak for u in links),
+        'uplink_busy': sum(busy) / len(links),
+        'uplink_busy_max': max(busy),
+    }
@@ -0,0 +1,103 @@
+"""
+--profile support: a simpy.Environment that attributes events and wall
+time to the generator that produced them.
+
+Each scheduled event is tagged with the process that was running when it
+was scheduled (Miner.mine, Node.receive, Node._delayed_propagation,
+wallet, coord, ...). When an event is processed, the time spent in its
+callbacks is charged to the process it resumes, or to its scheduler if it
+resumes none. The runner only uses this class when --profile is given, so
+normal runs keep the plain simpy.Environment.
+"""
+import time
+
+import simpy
+from simpy.events import Process
+
+# Generator names grouped into the simulator's subsystems
+SUBSYSTEMS = {
+    'Miner.mine': 'mining',
+    'MiningPool.mine': 'mining',
+    'Node.receive': 'gossip',
+    'Node._delayed_propagation': 'gossip',
+    'Node._announce': 'gossip',
+    'Node._send_compact': 'gossip',
+    '_broadcast_after': 'gossip',
+    'Node.send_message': 'gossip',
+    'wallet': 'wallets',
+    'wallet_arrivals': 'wallets',
+    'coord': 'coord',
+}
+
+
+def _process_name(proc):
+    # Generators carry their function's qualified name on every Python 3
+    return proc._generator.__qualname__
+
+
+class ProfiledEnvironment(simpy.Environment):
+    """simpy.Environment that counts scheduled/processed events and step time per origin."""
+
+    def __init__(self, initial_time=0):
+        super().__init__(initial_time)
+        self.scheduled = {}
+        self.processed = {}
+        self.wall = {}
+        self.queue_high_water = 0
+        self._origin = {}
+        self._current = 'setup'
+        self._started = None
+
+    def schedule(self, event, priority=simpy.core.NORMAL, delay=0):
+        proc = self.active_process
+        origin = _process_name(proc) if proc is not None else self._current
+        self._origin[event] = origin
+        self.scheduled[origin] = self.scheduled.get(origin, 0) + 1
+        super().schedule(event, priority, delay)
+        if len(self._queue) > self.queue_high_water:
+            self.queue_high_water = len(self._queue)
+
+    def step(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if not self._queue:
+            return super().step()
+        event = self._queue[0][3]
+        origin = self._origin.pop(event, 'other')
+        for cb in event.callbacks or ():
+            target = getattr(cb, '__self__', None)
+            if isinstance(target, Process):
+                origin = _process_name(target)
+                break
+        self._current = origin
+        start = time.perf_counter()
+        try:
+            super().step()
+        finally:
+            self.wall[origin] = self.wall.get(origin, 0.0) + time.perf_counter() - start
+            self.processed[origin] = self.processed.get(origin, 0) + 1
+            self._current = 'other'
+
+    def report(self):
+        """End-of-run profile: events and wall time by origin and by subsystem."""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        total = sum(self.processed.values())
+        busy = sum(self.wall.values())
+        lines = ["", "=" * 72, "PROFILE (events by originating process)",
+                 f"{'origin':<30} {'scheduled':>11} {'processed':>11} {'wall':>9} {'share':>6}"]
+        for origin in sorted(self.wall, key=self.wall.get, reverse=True):
+            share = self.wall[origin] / busy * 100 if busy else 0
+            lines.append(f"{origin:<30} {self.scheduled.get(origin, 0):>11,} {self.processed.get(origin, 0):>11,} "
+                         f"{self.wall[origin]:>8.2f}s {share:>5.1f}%")
+        by_subsystem = {}
+        for origin, t in self.wall.items():
+            name = SUBSYSTEMS.get(origin, 'other')
+            by_subsystem[name] = by_subsystem.get(name, 0.0) + t
+        lines.append("Subsystems: " + ", ".join(f"{k}:{v:.2f}s" for k, v in
+                                                sorted(by_subsystem.items(), key=lambda kv: -kv[1])))
+        rate = total / elapsed if elapsed > 0 else 0
+        lines.append(f"Events processed: {total:,} in {elapsed:.2f}s ({rate:,.0f} events/s), "
+                     f"outside event callbacks: {max(elapsed - busy, 0):.2f}s")
+        lines.append(f"Event queue high-water mark: {self.queue_high_water:,}")
+        lines.append("=" * 72)
+        return "\n".join(lines)
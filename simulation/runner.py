@@ -0,0 +1,327 @@
+import cProfile
+import time
+import simpy
+import numpy as np
+
+import simulation.globals as sim_globals
+from simulation.core import Node, NodeTable, Miner, Mempool, FeeMempool
+from simulation.core.mempool import FEE_EDGES
+from simulation.core.wallet import wallet, WalletArrivals, wallet_arrivals
+from simulation.coordinator import coord
+from simulation.fastforward import fast_forward
+from simulation.sharding import run_sharded
+from simulation.metrics import MetricsRegistry
+from simulation.trace import TraceWriter
+from simulation.profiling import ProfiledEnvironment
+from simulation.network.topology import Topology, build_topology
+from simulation.network.pdes import PartitionedGossip
+from simulation.network.relay import RelayStats
+from simulation.network.uplink import uplink_stats
+from simulation.network.latency import get_region_latency
+from simulation.checkpoint import Checkpointer, load_checkpoint
+from simulation.core.parallel_shards import parallel_processor
+from simulation.core.validation import make_validator
+
+# Danksharding imports
+from simulation.utils.danksharding_utils import enable_danksharding, disable_danksharding
+
+
+def reset_globals(max_pool=None):
+    sim_globals.network_data = 0
+    sim_globals.io_requests = 0
+    sim_globals.total_tx = 0
+    sim_globals.total_coins = 0
+    sim_globals.pool = Mempool(max_capacity=max_pool)
+    sim_globals.start_time = time.time()
+    # Reset Danksharding globals
+    sim_globals.total_blobs_processed = 0
+    sim_globals.total_blob_data = 0
+    sim_globals.parallel_speedup = 1.0
+    sim_globals.trace = None
+    sim_globals.relay = "push"
+    sim_globals.relay_stats = None
+    sim_globals.uplink = "ideal"
+
+
+def run_simulation(args, env_class=simpy.Environment, processor=None, metrics=None, on_block=None):
+    """
+    Build and run one simulation from parsed CLI args; returns coord()'s
+    summary dict. env_class lets benchmarks and profilers substitute an
+    instrumented simpy.Environment subclass; processor and metrics default
+    to the module-level shard processor and a fresh registry. on_block,
+    if given, is called with every block coord() creates.
+    """
+    if processor is None:
+        processor = parallel_processor
+    reset_globals(args.mempool_max)
+    if args.metrics_out:
+        MetricsRegistry.check_export(args.metrics_out)
+
+    if args.shards > 1:
+        # One worker process per shard chain, each running this function
+        if metrics is None:
+            metrics = MetricsRegistry()
+        summary = run_sharded(args, metrics=metrics)
+        if args.metrics_out:
+            metrics.export(args.metrics_out)
+            print(f"Metrics written to {args.metrics_out}")
+        return summary
+    
+    # Configure Danksharding
+    if args.danksharding:
+        enable_danksharding()
+        from simulation.core.blobs import danksharding_config
+
+        if hasattr(args, 'max_blobs') and args.max_blobs:
+            danksharding_config.max_blobs_per_block = args.max_blobs
+        if hasattr(args, 'tx_optimization') and args.tx_optimization:
+            danksharding_config.tx_optimization_rate = args.tx_optimization
+        if hasattr(args, 'parallel_shards') and args.parallel_shards:
+            processor.num_shards = args.parallel_shards
+        processor.validator = make_validator(args.validation, args.validation_cost)
+        processor.reset_stats()
+        if args.shard_executor == "process" and processor.num_shards > 1:
+            # One persistent worker pool for the whole run
+            processor.start(args.shard_workers)
+
+        print(f"Danksharding enabled: max_blobs={danksharding_config.max_blobs_per_block}, tx_optimization={danksharding_config.tx_optimization_rate}, parallel_shards={processor.num_shards}, validation={args.validation}")
+    else:
+        disable_danksharding()
+    
+    # Print configuration info
+    if hasattr(args, 'chain') and args.chain:
+        print(f"Using chain configuration: {args.chain}")
+    if hasattr(args, 'workload') and args.workload:
+        print(f"Using workload configuration: {args.workload}")
+    
+    # Apply fallback defaults for critical parameters
+    args.neighbors = args.neighbors or 5
+    args.interval = args.interval or 1.0
+    args.blocksize = args.blocksize or 4096
+    args.blocktime = args.blocktime or 600
+    args.hashrate = args.hashrate or 1000000
+    args.print_int = args.print_int or 144
+    args.init_reward = args.init_reward or 50
+    args.halving_interval = args.halving_interval or 210000
+    args.diff0 = args.diff0 or 0.0001
+
+    if args.fast_forward:
+        # No transactions: block times, retargets and issuance without the network
+        sim_globals.total_nodes = args.nodes
+        sim_globals.total_miners = args.miners
+        miners = [Miner(args.nodes + i, args.hashrate) for i in range(args.miners)]
+        if metrics is None:
+            metrics = MetricsRegistry(capacity=args.blocks_limit // args.print_int + 2)
+        summary = fast_forward(args.nodes, miners, args.blocktime, args.diff0, args.blocks_limit,
+                               args.print_int, args.init_reward, args.halving_interval, metrics=metrics)
+        if args.metrics_out:
+            metrics.export(args.metrics_out)
+            print(f"Metrics written to {args.metrics_out}")
+        return summary
+    
+    # Resume from a checkpoint: same structure, state restored below
+    ckpt = None
+    if args.resume:
+        ckpt = load_checkpoint(args.resume)
+        ckpt.check_args(args)
+        print(f"Resuming from {ckpt.path} (block {ckpt.block}, t={ckpt.time:.2f}s)")
+
+    # Initialize simulation environment
+    if args.profile and env_class is simpy.Environment:
+        env_class = ProfiledEnvironment
+    env = env_class(initial_time=ckpt.time if ckpt else 0)
+    if ckpt:
+        ckpt.restore_globals(Mempool(max_capacity=args.mempool_max))
+        if args.danksharding:
+            ckpt.restore_processor(processor)
+    
+    # Initialize simulation globals
+    sim_globals.total_nodes = args.nodes
+    sim_globals.total_miners = args.miners
+    
+    # Create wallets and transactions first
+    arrivals = None
+    if args.wallets > 0 and args.transactions > 0:
+        if args.arrivals == "aggregated":
+            # One process for all wallets, inserting arrivals in batches
+            arrivals = WalletArrivals(args.wallets, args.transactions, args.interval)
+            if ckpt:
+                arrivals.emitted = ckpt.arrivals['emitted']
+                arrivals.next_wake = ckpt.arrivals['next_wake']
+            env.process(wallet_arrivals(env, arrivals, args.blocktime))
+        elif ckpt:
+            # Every wallet ticks together; start each one at its next tick
+            ticks = np.cumsum(np.full(args.transactions, args.interval, dtype=np.float64))
+            emitted = int(np.searchsorted(ticks, env.now, side='right'))
+            if emitted < args.transactions:
+                first = float(ticks[emitted]) - env.now
+                for i in range(args.wallets):
+                    env.process(wallet(env, i, args.transactions - emitted, args.interval, first=first))
+        else:
+            for i in range(args.wallets):
+                # Generate transactions using wallet function
+                env.process(wallet(env, i, args.transactions, args.interval))
+    
+    # Create nodes
+    if args.node_table:
+        if ckpt:
+            nodes = NodeTable(env, args.nodes, blocktime=args.blocktime,
+                              regions=ckpt.regions, bandwidth_mbps=ckpt.bandwidth_mbps)
+        else:
+            nodes = NodeTable(env, args.nodes, blocktime=args.blocktime)
+        regions = nodes.region
+    else:
+        nodes = []
+        names = get_region_latency().names
+        for i in range(args.nodes):
+            if ckpt:
+                node = Node(env, i, location=names[ckpt.regions[i]],
+                            bandwidth_mbps=float(ckpt.bandwidth_mbps[i]), blocktime=args.blocktime)
+            else:
+                node = Node(env, i, blocktime=args.blocktime)
+            nodes.append(node)
+        regions = np.array([n.region for n in nodes], dtype=np.int32)
+
+    # Set up node neighbors as views into one CSR adjacency
+    if ckpt:
+        topology = Topology(ckpt.indptr, ckpt.indices)
+    else:
+        topology = build_topology(args.topology, len(nodes), args.neighbors, regions=regions)
+    topology.attach(nodes)
+    if ckpt:
+        ckpt.restore_seen(nodes)
+    
+    # Partitioned gossip in worker processes
+    gossip = None
+    if args.propagation == "pdes":
+        if args.node_table:
+            bandwidth = nodes.bandwidth_mbps
+        else:
+            bandwidth = np.fromiter((n.bandwidth_mbps for n in nodes), dtype=np.float32, count=len(nodes))
+        gossip = PartitionedGossip(topology, regions, bandwidth, args.blocktime, args.partitions)
+    
+    # Block relay protocol of event-driven gossip
+    sim_globals.relay = args.relay
+    sim_globals.uplink = args.uplink
+    if args.propagation == "gossip":
+        sim_globals.relay_stats = RelayStats(args.relay, len(nodes))
+        if ckpt:
+            ckpt.restore_relay(sim_globals.relay_stats)
+
+    # Create miners
+    miners = []
+    for i in range(args.miners):
+        miner = Miner(args.nodes + i, args.hashrate)
+        miners.append(miner)
+    
+    # Start coordinator process
+    if metrics is None:
+        metrics = MetricsRegistry(capacity=args.blocks_limit // args.print_int + 2 if args.blocks_limit else 1024)
+    if args.mempool == "fee":
+        # Nothing has arrived yet: wallets only insert once the run starts
+        sim_globals.pool = FeeMempool(max_bytes=int(args.mempool_mb * 1e6),
+                                      fee_hist=metrics.histogram('fee_rate', FEE_EDGES))
+    checkpointer = None
+    if args.checkpoint_dir:
+        checkpointer = Checkpointer(args.checkpoint_dir, args.checkpoint_every, args, nodes, topology,
+                                    arrivals=arrivals, metrics=metrics,
+                                    processor=processor if args.danksharding else None)
+    coord_proc = env.process(coord(
+        env, nodes, miners,
+        args.blocktime, args.diff0,
+        args.blocks_limit, args.blocksize,
+        args.print_int, args.debug,
+        args.wallets, args.transactions,
+        args.init_reward, args.halving_interval,
+        arrivals=arrivals,
+        mining=args.mining,
+        propagation=args.propagation,
+        metrics=metrics,
+        processor=processor,
+        checkpoint=checkpointer,
+        resume=ckpt,
+        gossip=gossip,
+        on_block=on_block
+    ))
+
+    if ckpt:
+        # Last, so that building the network above draws nothing from them
+        ckpt.restore_rng()
+
+    if args.trace:
+        sim_globals.trace = TraceWriter(args.trace)
+
+    # Run simulation
+    profiler = cProfile.Profile() if args.profile_out else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        env.run(until=coord_proc)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+        if sim_globals.trace is not None:
+            sim_globals.trace.close()
+            print(f"Trace written to {args.trace}")
+            sim_globals.trace = None
+        if gossip is not None:
+            gossip.close()
+        if args.danksharding:
+            processor.shutdown()
+            sim_globals.parallel_speedup = processor.measured_speedup
+    summary = coord_proc.value
+    if sim_globals.relay_stats is not None:
+        relay = sim_globals.relay_stats.summary()
+        summary.update(relay)
+        print(f"Relay {relay['relay']}: {relay['relay_bytes_per_block']/1e3:.1f} KB/block on the wire "
+              f"median:{relay['relay_median']:.3f}s p90:{relay['relay_p90']:.3f}s "
+              f"full:{relay['relay_full']:.3f}s coverage:{relay['relay_coverage']*100:.1f}%")
+        sim_globals.relay_stats = None
+    if args.mempool_max and sim_globals.pool.dropped:
+        summary['pool_dropped'] = sim_globals.pool.dropped
+        print(f"Mempool full: {sim_globals.pool.dropped} transactions dropped at --mempool-max {args.mempool_max}")
+    if args.mempool == "fee":
+        fees = sim_globals.pool.fee_stats()
+        summary.update(fees)
+        print(f"Mempool fee: included p10:{fees['fee_p10']:.2f} p50:{fees['fee_p50']:.2f} "
+              f"p90:{fees['fee_p90']:.2f} sat/vB, pending {fees['mempool_bytes']/1e6:.2f} MB, "
+              f"evicted {fees['mempool_dropped']} (last at {fees['mempool_min_fee']:.2f} sat/vB)")
+    if args.uplink == "shared":
+        links = uplink_stats(nodes, summary['sim_time'])
+        summary.update(links)
+        print(f"Uplink shared: peak {links['uplink_peak']} concurrent sends, busy {links['uplink_busy']*100:.2f}% "
+              f"of the time on average over the sending nodes, {links['uplink_busy_max']*100:.2f}% on the busiest")
+    if gossip is not None:
+        print(gossip.report())
+    if isinstance(env, ProfiledEnvironment):
+        print(env.report())
+    if profiler is not None:
+        print(f"cProfile stats written to {args.profile_out} (pstats format: snakeviz, flameprof, gprof2dot)")
+    if args.metrics_out:
+        metrics.export(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
+
+    # Print Danksharding results if enabled
+    if args.danksharding and sim_globals.danksharding_enabled:
+        print("\n" + "="*60)
+        print("DANKSHARDING PERFORMANCE RESULTS:")
+        print(f"Parallel shards used: {args.parallel_shards}")
+        print(f"Parallel speedup achieved: {sim_globals.parallel_speedup:.1f}x (measured)")
+        if processor.shard_times:
+            times = ", ".join(f"{k}:{v:.2f}s" for k, v in sorted(processor.shard_times.items()))
+            print(f"Per-shard processing time: {times}")
+        print(f"Total blobs processed: {sim_globals.total_blobs_processed:,}")
+        print(f"Total blob data: {sim_globals.total_blob_data:,} bytes ({sim_globals.total_blob_data/1024/1024:.2f} MB)")
+        if sim_globals.total_blobs_processed > 0:
+            print(f"Average blob size: {sim_globals.total_blob_data/sim_globals.total_blobs_processed:.0f} bytes")
+        
+        # Calculate performance improvements
+        from simulation.core.blobs import danksharding_config
+        optimized_tx_ratio = danksharding_config.tx_optimization_rate
+        print(f"Transaction optimization rate: {optimized_tx_ratio:.1%}")
+        theoretical_speedup = sim_globals.parallel_speedup * (1/(1-optimized_tx_ratio*0.9))
+        print(f"Theoretical TPS improvement: {theoretical_speedup:.1f}x")
+        print("="*60)
+
+    return summary
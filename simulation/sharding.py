@@ -0,0 +1,274 @@
+"""
+--shards N: N shard chains, each a full simulation in its own process.
+
+Every shard runs the usual coord() loop over its own slice of the nodes,
+miners and wallets (so its own mempool), in a worker process. Shards
+synchronize at beacon blocks, every --beacon-interval seconds of
+simulated time: each shard stops before its first event past the beacon,
+reports what it did since the last one and the cross-shard receipts it
+produced, and waits for the receipts addressed to it. The parent relays
+receipts over one pipe per shard, so a run is deterministic for a given
+seed regardless of process scheduling.
+
+A transaction is cross-shard with probability --cross-shard; its receipt
+goes to a uniformly chosen other shard, arrives at the next beacon and
+costs the receiving shard one message. The run ends when every shard's
+coord() has finished; the summary has aggregate and per-shard block
+time and TPS, message counts and cross-shard receipt latency.
+"""
+import contextlib
+import copy
+import functools
+import io
+import multiprocessing
+import random
+import time
+import traceback
+import numpy as np
+import simpy
+
+import simulation.globals as sim_globals
+from .metrics import MetricsRegistry
+from .network.message import NetworkMessage
+from .utils.formatter import human
+
+RECEIPT_SIZE = NetworkMessage('transaction', None).size
+
+
+class ShardLink:
+    """
+    Shard side of the beacon sync. Its block() is coord()'s on_block hook,
+    so it sees every block the shard creates; at each beacon it draws the
+    receipts of the transactions included since the last one and swaps
+    them with the parent over `conn`.
+    """
+
+    def __init__(self, shard_id, num_shards, interval, cross_shard, seed, conn):
+        self.shard_id = shard_id
+        self.num_shards = num_shards
+        self.interval = interval
+        self.cross_shard = cross_shard
+        self.rng = np.random.default_rng(seed)
+        self.conn = conn
+        self.beacon = 0
+        self.next_beacon = interval
+        self.pending = []  # (time, user txs) of blocks since the last beacon
+        self.blocks = 0
+        self.block_bytes = 0
+        self.receipts_out = 0
+        self.receipts_in = 0
+        self.latency = 0.0  # summed over receipts
+
+    def block(self, block_id, miner_id, t, size, txs, blobs):
+        self.pending.append((t, txs - 1))  # minus the coinbase
+        self.blocks += 1
+        self.block_bytes += size
+
+    def _receipts(self):
+        # Receipts of the transactions since the last beacon, by destination shard
+        out = np.zeros(self.num_shards, dtype=np.int64)
+        if not self.pending or self.num_shards < 2 or self.cross_shard <= 0:
+            self.pending = []
+            return out
+        t, txs = np.array(self.pending).T
+        cross = self.rng.binomial(txs.astype(np.int64), self.cross_shard)
+        self.latency += float(np.dot(cross, self.next_beacon - t))
+        total = int(cross.sum())
+        others = [s for s in range(self.num_shards) if s != self.shard_id]
+        out[others] = self.rng.multinomial(total, [1 / len(others)] * len(others))
+        self.receipts_out += total
+        self.pending = []
+        return out
+
+    def stats(self, now):
+        return {'time': now, 'blocks': self.blocks, 'total_tx': sim_globals.total_tx,
+                'io_requests': sim_globals.io_requests, 'block_bytes': self.block_bytes,
+                'receipts_out': self.receipts_out, 'receipts_in': self.receipts_in, 'latency': self.latency}
+
+    def sync(self, now):
+        """Beacon boundary: report, then receive this shard's receipts."""
+        self.beacon += 1
+        self.conn.send(('beacon', self._receipts(), self.stats(now)))
+        incoming = self.conn.recv()
+        self.receipts_in += incoming
+        sim_globals.io_requests += incoming
+        sim_globals.network_data += incoming * RECEIPT_SIZE
+        self.next_beacon = (self.beacon + 1) * self.interval
+
+    def finish(self, now, summary):
+        self.conn.send(('done', self._receipts(), self.stats(now), summary))
+
+
+class BeaconEnvironment(simpy.Environment):
+    """simpy.Environment that stops at every beacon boundary to sync its shard."""
+
+    def __init__(self, initial_time=0, link=None):
+        super().__init__(initial_time)
+        self.link = link
+
+    def step(self):
+        t = self.peek()
+        while t != simpy.core.Infinity and t >= self.link.next_beacon:
+            self.link.sync(self.now)
+        super().step()
+
+
+def shard_args(args, shard_id, num_shards):
+    """CLI args of one shard: its slice of nodes, miners and wallets."""
+    def part(n):
+        return n // num_shards + (1 if shard_id < n % num_shards else 0)
+
+    a = copy.copy(args)
+    a.nodes = part(args.nodes)
+    a.miners = part(args.miners)
+    a.wallets = part(args.wallets or 0)
+    a.shards = 0
+    a.metrics_out = None
+    # Nested process pools would oversubscribe the cores the shards already use
+    a.shard_executor = "serial"
+    return a
+
+
+def _shard_worker(shard_id, args, num_shards, interval, cross_shard, seed, conn):
+    from .runner import run_simulation
+
+    random.seed(seed)
+    link = ShardLink(shard_id, num_shards, interval, cross_shard, seed, conn)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = run_simulation(args, env_class=functools.partial(BeaconEnvironment, link=link),
+                                     on_block=link.block)
+        link.finish(summary['sim_time'], summary)
+    except Exception:
+        conn.send(('error', None, None, traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def run_sharded(args, metrics=None):
+    """Run args.shards shard chains in worker processes; returns the aggregate summary."""
+    n = args.shards
+    interval = args.beacon_interval or args.blocktime or 600
+    print_int = args.print_int or 144
+    seeds = [random.getrandbits(64) for _ in range(n)]
+    print(f"Sharded: {n} shards, beacon every {interval:.2f}s, cross-shard {args.cross_shard:.0%}")
+
+    if metrics is None:
+        metrics = MetricsRegistry()
+    m_beacons = metrics.counter('beacons')
+    m_blocks = metrics.counter('blocks')
+    m_tx = metrics.counter('total_tx')
+    m_io = metrics.counter('io_requests')
+    m_cross = metrics.counter('cross_shard')
+    m_active = metrics.gauge('active_shards')
+    m_tps = metrics.gauge('tps')
+
+    ctx = multiprocessing.get_context()
+    conns, procs = [], []
+    for s in range(n):
+        parent, child = ctx.Pipe()
+        p = ctx.Process(target=_shard_worker, args=(s, shard_args(args, s, n), n, interval,
+                                                    args.cross_shard, seeds[s], child))
+        p.start()
+        child.close()
+        conns.append(parent)
+        procs.append(p)
+
+    active = list(range(n))
+    stats = [None] * n
+    summaries = [None] * n
+    late = np.zeros(n, dtype=np.int64)  # receipts for shards that had already finished
+    beacon = 0
+    last_t = last_tx = 0
+    try:
+        while active:
+            beacon += 1
+            incoming = np.zeros(n, dtype=np.int64)
+            for s in active:
+                try:
+                    msg = conns[s].recv()
+                except EOFError:
+                    raise RuntimeError(f"Shard {s} exited without a result") from None
+                if msg[0] == 'error':
+                    raise RuntimeError(f"Shard {s} failed:\n{msg[3]}")
+                incoming += msg[1]
+                stats[s] = msg[2]
+                if msg[0] == 'done':
+                    summaries[s] = msg[3]
+            active = [s for s in active if summaries[s] is None]
+            for s in range(n):
+                if s in active:
+                    conns[s].send(int(incoming[s]))
+                else:
+                    late[s] += incoming[s]
+
+            if beacon % print_int == 0 or not active:
+                t = beacon * interval if active else max(st['time'] for st in stats)
+                tx = sum(st['total_tx'] for st in stats)
+                m_beacons.value = beacon
+                m_blocks.value = sum(st['blocks'] for st in stats)
+                m_tx.value = tx
+                m_io.value = sum(st['io_requests'] for st in stats) + int(late.sum())
+                m_cross.value = sum(st['receipts_out'] for st in stats)
+                m_active.set(len(active))
+                m_tps.set((tx - last_tx) / (t - last_t) if t > last_t else 0)
+                metrics.sample(t)
+                if active:
+                    print(f"[{t:.2f}] Beacon {beacon} shards:{len(active)}/{n} B:{m_blocks.value} "
+                          f"Tx:{tx} tps:{m_tps.value:.2f} X:{m_cross.value} IO:{m_io.value}")
+                last_t, last_tx = t, tx
+    finally:
+        for c in conns:
+            c.close()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+
+    # Receipts delivered after a shard finished still cost it a message
+    for s in range(n):
+        summaries[s]['io_requests'] += int(late[s])
+        summaries[s]['network_data'] += int(late[s]) * RECEIPT_SIZE
+        summaries[s]['receipts_in'] = stats[s]['receipts_in'] + int(late[s])
+        summaries[s]['receipts_out'] = stats[s]['receipts_out']
+        summaries[s]['block_size'] = stats[s]['block_bytes'] / stats[s]['blocks'] if stats[s]['blocks'] else 0
+
+    print()
+    for s, sm in enumerate(summaries):
+        print(f"Shard {s}: B:{sm['blocks']} abt:{sm['abt']:.2f}s tps:{sm['tps']:.2f} Tx:{sm['total_tx']} "
+              f"size:{sm['block_size']:.0f}B C:{human(sm['total_coins'])} Pool:{sm['pool']} "
+              f"X out:{sm['receipts_out']} in:{sm['receipts_in']} IO:{sm['io_requests']}")
+
+    sim_time = max(sm['sim_time'] for sm in summaries)
+    total_tx = sum(sm['total_tx'] for sm in summaries)
+    receipts = sum(sm['receipts_out'] for sm in summaries)
+    latency = sum(st['latency'] for st in stats)
+    simulation_time = time.time() - sim_globals.start_time
+    summary = {
+        'shards': n,
+        'beacons': beacon,
+        'blocks': sum(sm['blocks'] for sm in summaries),
+        'blocks_limit': args.blocks_limit,
+        'sim_time': sim_time,
+        'abt': float(np.mean([sm['abt'] for sm in summaries])),
+        'tps': total_tx / sim_time if sim_time > 0 else 0,
+        'total_tx': total_tx,
+        'total_coins': sum(sm['total_coins'] for sm in summaries),
+        'pool': sum(sm['pool'] for sm in summaries),
+        'network_data': sum(sm['network_data'] for sm in summaries),
+        'io_requests': sum(sm['io_requests'] for sm in summaries),
+        'block_size': float(np.mean([sm['block_size'] for sm in summaries])),
+        'cross_shard': receipts,
+        'cross_shard_latency': latency / receipts if receipts else 0,
+        'shard_abt': [sm['abt'] for sm in summaries],
+        'shard_tps': [sm['tps'] for sm in summaries],
+        'shard_blocks': [sm['blocks'] for sm in summaries],
+        'wall_time': simulation_time,
+    }
+    print(f"[******] End Shards:{n} Beacons:{beacon} B:{summary['blocks']} abt:{summary['abt']:.2f}s "
+          f"tps:{summary['tps']:.2f} Tx:{total_tx} C:{human(summary['total_coins'])} X:{receipts} "
+          f"X-latency:{summary['cross_shard_latency']:.2f}s NMB:{summary['network_data']/1e6:.2f} "
+          f"IO:{summary['io_requests']}")
+    print(f"\nSimulation completed in {simulation_time:.2f} seconds")
+    print(f"Simulated blockchain time: {sim_time:.2f} seconds")
+    return summary
@@ -0,0 +1,123 @@
+"""
+Re-entrant simulation runs.
+
+The simulator's hot paths read process-wide state: the counters and pool
+in simulation.globals, the Danksharding config, the shard processor and
+the region latency generator. A Simulation owns its own copy of each of
+these and installs them only while run() executes, restoring whatever was
+there before, so many runs can execute back to back in one interpreter
+without leaking state into each other:
+
+    from simulation import Simulation
+    for n in (100, 1000):
+        result = Simulation.from_params({'chain': 'btc', 'nodes': n, 'blocks': 20}, seed=1).run()
+        print(n, result.tps, result.io_requests)
+
+Imports, the locations file, the latency matrices and chain configs are
+loaded once per process and shared read-only. Runs in several threads are
+safe but serialized by a lock, since SimPy and the simulator are pure
+Python; use processes (see simulation.sweep) for parallelism.
+"""
+import contextlib
+import io
+import random
+import threading
+
+import simulation.globals as sim_globals
+from .cli.parser import parse_args
+from .core import blobs
+from .core.parallel_shards import ParallelShardProcessor
+from .metrics import MetricsRegistry
+from .network import latency
+
+# Module state a run overwrites; saved before and restored after each run
+GLOBALS = ('network_data', 'io_requests', 'total_tx', 'total_coins', 'pool', 'start_time', 'trace',
+           'relay', 'relay_stats', 'uplink', 'danksharding_enabled', 'total_blobs_processed', 'total_blob_data', 'parallel_speedup',
+           'total_nodes', 'total_miners')
+
+_run_lock = threading.Lock()
+_MISSING = object()
+
+
+class SimulationResult:
+    """
+    Outcome of one run: the summary from coord() (also readable as
+    attributes, e.g. result.tps), the metrics time series and the args.
+    """
+
+    def __init__(self, summary, metrics, args, output=None):
+        self.summary = summary
+        self.metrics = metrics
+        self.args = args
+        self.output = output  # captured stdout when run quietly
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['summary'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self.summary[name]
+
+    def to_dict(self):
+        return dict(self.summary)
+
+    def __repr__(self):
+        return f"SimulationResult(blocks={self.summary.get('blocks')}, tps={self.summary.get('tps', 0):.2f})"
+
+
+class Simulation:
+    """
+    One simulation and the state it owns. `args` is a list of CLI
+    arguments (as for sim-blockchain.py) or an already parsed Namespace.
+    With a seed, run() is reproducible regardless of what ran before it.
+    """
+
+    def __init__(self, args=None, seed=None):
+        if args is None or isinstance(args, (list, tuple)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                args = parse_args(list(args or []))
+        self.args = args
+        self.seed = seed
+        self.processor = ParallelShardProcessor()
+        self.danksharding_config = blobs.DankShardConfig()
+        self.region_latency = None  # forked from the shared matrices at run()
+
+    @classmethod
+    def from_params(cls, params, seed=None):
+        """Build from a dict of CLI-style keys, as used in sweep specs."""
+        from .sweep import params_to_argv
+        return cls(params_to_argv(params), seed=seed)
+
+    def run(self, quiet=True):
+        """Run to completion and return a SimulationResult; output is captured when quiet."""
+        from .runner import run_simulation
+
+        with _run_lock:
+            saved_globals = {k: getattr(sim_globals, k, _MISSING) for k in GLOBALS}
+            saved_random = random.getstate()
+            saved_config = blobs.danksharding_config
+            shared = latency.get_region_latency()
+            try:
+                if self.seed is not None:
+                    random.seed(self.seed)
+                self.region_latency = shared.fork(random.getrandbits(64))
+                latency.set_region_latency(self.region_latency)
+                blobs.danksharding_config = self.danksharding_config
+                metrics = MetricsRegistry()
+
+                out = io.StringIO() if quiet else None
+                with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+                    summary = run_simulation(self.args, processor=self.processor, metrics=metrics)
+            finally:
+                latency.set_region_latency(shared)
+                blobs.danksharding_config = saved_config
+                random.setstate(saved_random)
+                for k, v in saved_globals.items():
+                    if v is _MISSING:
+                        if hasattr(sim_globals, k):
+                            delattr(sim_globals, k)
+                    else:
+                        setattr(sim_globals, k, v)
+        return SimulationResult(summary, metrics, self.args, out.getvalue() if quiet else None)
@@ -0,0 +1,163 @@
+"""
+Parallel parameter sweeps.
+
+A sweep spec is a JSON object with CLI-style keys (as accepted by
+sim-blockchain.py, without the leading dashes):
+
+    {
+        "base": {"miners": 1000, "hashrate": 1e6, "wallets": 1000,
+                 "transactions": 500, "interval": 0.01, "print": 50},
+        "grid": {"chain": ["btc", "bch"], "nodes": [1000, 2500],
+                 "parallel-shards": [1, 4, 8]},
+        "list": [{"danksharding": true, "tx-optimization": 0.8}],
+        "runs": 3,
+        "seed": 1
+    }
+
+Cells are the cartesian product of "grid" applied on top of "base" and,
+if given, of every entry in "list". Each cell is run "runs" times on a
+ProcessPoolExecutor with its own seed. Finished runs are appended to a
+JSON-lines progress file next to the CSV, and a restarted sweep skips
+them.
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .utils.formatter import duration
+
+# Same columns as "result mw.csv"
+RESULT_COLUMNS = [
+    'currency', 'nodes', 'wallets', 'miners', 'transactions', 'interval', 'shards',
+    'average block time', 'block size per shard', 'messages', 'mode', 'tps',
+    'time taken for simulation', 'average block time per shard', 'wallets', 'transactions',
+    'total block size = block size per shard * number of shards',
+]
+
+
+def load_spec(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def expand_spec(spec):
+    """List of (cell_key, params, run, seed) for every run in the sweep."""
+    base = spec.get('base', {})
+    grid = spec.get('grid', {})
+    variants = spec.get('list') or [{}]
+    runs = spec.get('runs', 1)
+    seed = spec.get('seed', 0)
+
+    keys = list(grid)
+    tasks = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        for variant in variants:
+            params = dict(base)
+            params.update(zip(keys, values))
+            params.update(variant)
+            cell = json.dumps(params, sort_keys=True)
+            for run in range(1, runs + 1):
+                digest = hashlib.sha256(f"{seed}:{cell}:{run}".encode()).digest()
+                tasks.append((cell, params, run, int.from_bytes(digest[:8], 'little')))
+    return tasks
+
+
+def params_to_argv(params):
+    argv = []
+    for key, value in params.items():
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif value is False or value is None:
+            continue
+        else:
+            argv.extend([flag, str(value)])
+    return argv
+
+
+def run_cell(params, seed):
+    """Worker entry point: run one simulation quietly and return its summary."""
+    from .simulation import Simulation
+
+    # The sweep already uses every core; shard batches run in the worker itself
+    sim = Simulation(['--shard-executor', 'serial'] + params_to_argv(params), seed=seed)
+    summary = sim.run(quiet=True).to_dict()
+    summary['args'] = {k: v for k, v in vars(sim.args).items() if isinstance(v, (int, float, str, bool, type(None)))}
+    return summary
+
+
+def result_row(summary):
+    """One row of the result table from a run summary."""
+    args = summary['args']
+    danksharding = args.get('danksharding')
+    sharded = summary.get('shards', 0) > 1
+    if sharded:
+        shards, mode = summary['shards'], 'sharded'
+        per_shard = " / ".join(f"{abt:.2f}" for abt in summary['shard_abt']) + " seconds"
+    else:
+        shards = args.get('parallel_shards', 0) if danksharding else 0
+        mode = 'danksharding' if danksharding else 'conventional'
+        per_shard = 'N/A'
+    blocksize = args.get('blocksize')
+    return [
+        args.get('chain') or '', args.get('nodes'), args.get('wallets'), args.get('miners'),
+        args.get('transactions'), args.get('interval'), shards,
+        f"{summary['abt']:.2f} seconds", blocksize, summary['io_requests'],
+        mode, round(summary['tps'], 2),
+        duration(summary['wall_time']), per_shard, args.get('wallets'), args.get('transactions'),
+        blocksize * max(shards, 1) if blocksize else '',
+    ]
+
+
+def _load_progress(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rec = json.loads(line)
+                    done[(rec['cell'], rec['run'])] = rec
+    return done
+
+
+def run_sweep(spec, out_csv, workers=None, resume=True):
+    """Run every cell of the sweep and write the result table to out_csv; returns all records."""
+    progress_path = out_csv + '.progress.jsonl'
+    if not resume:
+        for path in (out_csv, progress_path):
+            if os.path.exists(path):
+                os.remove(path)
+    done = _load_progress(progress_path)
+    tasks = [t for t in expand_spec(spec) if (t[0], t[2]) not in done]
+    total = len(tasks) + len(done)
+    print(f"Sweep: {total} runs, {len(done)} already finished, {len(tasks)} to go")
+
+    if not os.path.exists(out_csv):
+        with open(out_csv, 'w', newline='') as f:
+            csv.writer(f).writerow(RESULT_COLUMNS)
+
+    workers = workers or os.cpu_count() or 1
+    records = list(done.values())
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(progress_path, 'a') as progress, open(out_csv, 'a', newline='') as table:
+        writer = csv.writer(table)
+        futures = {pool.submit(run_cell, params, seed): (cell, run, seed) for cell, params, run, seed in tasks}
+        for fut in as_completed(futures):
+            cell, run, seed = futures[fut]
+            try:
+                summary = fut.result()
+            except Exception as e:
+                print(f"[{len(records)}/{total}] FAILED run {run} of {cell}: {e}")
+                continue
+            rec = {'cell': cell, 'run': run, 'seed': seed, 'summary': summary}
+            progress.write(json.dumps(rec) + '\n')
+            progress.flush()
+            writer.writerow(result_row(summary))
+            table.flush()
+            records.append(rec)
+            print(f"[{len(records)}/{total}] run {run} of {cell}: tps {summary['tps']:.2f}")
+    return records
@@ -0,0 +1,162 @@
+"""
+Binary event trace of block creation and propagation.
+
+A trace is a directory with one append-only raw file per column and a
+small meta.json giving each column's dtype and length:
+
+    blocks:   id, miner, created, size, txs, blobs   (one row per block)
+    arrivals: block, node, time                      (one row per first receipt)
+
+The writer buffers rows in preallocated NumPy arrays and appends them to
+the column files in large batches, so a hot-path record is a method call
+and a few array stores. load_trace() memory-maps the columns back as
+NumPy arrays without parsing anything.
+
+    python sim-blockchain.py ... --trace run.trace
+    trace = load_trace('run.trace')
+    trace.arrivals['time'][trace.arrivals['block'] == 42]
+"""
+import json
+import os
+import numpy as np
+
+BLOCK_COLUMNS = (('id', np.int64), ('miner', np.int64), ('created', np.float64),
+                 ('size', np.int64), ('txs', np.int64), ('blobs', np.int32))
+ARRIVAL_COLUMNS = (('block', np.int64), ('node', np.int32), ('time', np.float64))
+
+
+class _Table:
+    # Column buffers for one table, appended to <dir>/<table>.<column>.bin
+    def __init__(self, path, name, columns, batch):
+        self.name = name
+        self.columns = columns
+        self.buffers = [np.empty(batch, dtype=dtype) for _, dtype in columns]
+        self.files = [open(os.path.join(path, f"{name}.{col}.bin"), 'wb') for col, _ in columns]
+        self.n = 0
+        self.rows = 0
+
+    def flush(self):
+        if self.n:
+            for buf, f in zip(self.buffers, self.files):
+                buf[:self.n].tofile(f)
+                f.flush()
+            self.rows += self.n
+            self.n = 0
+
+    def close(self):
+        self.flush()
+        for f in self.files:
+            f.close()
+
+
+class TraceWriter:
+    """
+    Trace writer; an existing trace at `path` is overwritten. Rows are
+    appended to the column files every `batch` records, and meta.json is
+    rewritten on flush() so a trace can be read while the run continues.
+    """
+
+    def __init__(self, path, batch=1 << 16):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self.path = path
+        self.batch = batch
+        self.blocks = _Table(path, 'blocks', BLOCK_COLUMNS, batch)
+        self.arrivals = _Table(path, 'arrivals', ARRIVAL_COLUMNS, batch)
+
+    def block(self, block_id, miner, created, size, txs, blobs):
+        t = self.blocks
+        i = t.n
+        ids, miners, times, sizes, counts, blob_counts = t.buffers
+        ids[i] = block_id
+        miners[i] = miner
+        times[i] = created
+        sizes[i] = size
+        counts[i] = txs
+        blob_counts[i] = blobs
+        t.n = i + 1
+        if t.n == self.batch:
+            self.flush()
+
+    def arrival(self, block_id, node, time):
+        t = self.arrivals
+        i = t.n
+        blocks, nodes, times = t.buffers
+        blocks[i] = block_id
+        nodes[i] = node
+        times[i] = time
+        t.n = i + 1
+        if t.n == self.batch:
+            self.flush()
+
+    def arrivals_many(self, block_id, nodes, times):
+        """Record many arrivals of one block at once (shortest-path propagation)."""
+        t = self.arrivals
+        nodes = np.asarray(nodes)
+        times = np.asarray(times)
+        start = 0
+        while start < nodes.shape[0]:
+            k = min(self.batch - t.n, nodes.shape[0] - start)
+            blocks, node_buf, time_buf = t.buffers
+            blocks[t.n:t.n + k] = block_id
+            node_buf[t.n:t.n + k] = nodes[start:start + k]
+            time_buf[t.n:t.n + k] = times[start:start + k]
+            t.n += k
+            start += k
+            if t.n == self.batch:
+                self.flush()
+
+    def flush(self):
+        self.blocks.flush()
+        self.arrivals.flush()
+        meta = {'tables': {}}
+        for table in (self.blocks, self.arrivals):
+            meta['tables'][table.name] = {
+                'rows': table.rows,
+                'columns': [[col, np.dtype(dtype).str] for col, dtype in table.columns],
+            }
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def close(self):
+        self.flush()
+        self.blocks.close()
+        self.arrivals.close()
+
+
+class Trace:
+    """A loaded trace: `blocks` and `arrivals` map column names to read-only memmaps."""
+
+    def __init__(self, path):
+        meta = _read_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"No trace at '{path}' (missing meta.json)")
+        self.path = path
+        for name, table in meta['tables'].items():
+            columns = {}
+            for col, dtype in table['columns']:
+                file = os.path.join(path, f"{name}.{col}.bin")
+                if table['rows']:
+                    columns[col] = np.memmap(file, dtype=np.dtype(dtype), mode='r', shape=(table['rows'],))
+                else:
+                    columns[col] = np.empty(0, dtype=np.dtype(dtype))
+            setattr(self, name, columns)
+
+    def arrival_times(self, block_id):
+        """(node ids, arrival times) of one block."""
+        mask = self.arrivals['block'] == block_id
+        return self.arrivals['node'][mask], self.arrivals['time'][mask]
+
+
+def _read_meta(path):
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        return json.load(f)
+
+
+def load_trace(path):
+    return Trace(path)
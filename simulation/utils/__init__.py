@@ -1,4 +1,4 @@
-from .formatter import human
+from .formatter import human, duration
 from .config_loader import load_config, load_chain_config, load_workload_config, merge_configs, apply_workload_config
 
-__all__ = ['human', 'load_config', 'load_chain_config', 'load_workload_config', 'merge_configs', 'apply_workload_config']
+__all__ = ['human', 'duration', 'load_config', 'load_chain_config', 'load_workload_config', 'merge_configs', 'apply_workload_config']
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import simulation.globals as sim_globals
 
 def calculate_distance(node1, node2):
@@ -14,3 +15,15 @@ def calculate_distance(node1, node2):
     distance_km = sim_globals.RADIUS * c
 
     return distance_km
+
+
+def haversine_matrix(lat, lon):
+    """Pairwise great-circle distances (km) between points given as degree arrays."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    a = np.clip(a, 0.0, 1.0)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return sim_globals.RADIUS * c
@@ -10,3 +10,15 @@ def human(n):
     else:
         return str(int(n))
     return f"{int(v) if v.is_integer() else f'{v:.1f}'}{s}"
+
+
+# Format a wall-clock duration like "14 minutes 42 seconds"
+def duration(seconds):
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    parts = []
+    for v, unit in ((h, 'hour'), (m, 'minute'), (s, 'second')):
+        if v or (unit == 'second' and not parts):
+            parts.append(f"{v} {unit}{'' if v == 1 else 's'}")
+    return ' '.join(parts)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import simpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation.network.uplink import Uplink
+
+
+def run(env, limit=100000):
+    steps = 0
+    while env.peek() != simpy.core.Infinity and steps < limit:
+        env.step()
+        steps += 1
+    return steps
+
+
+def test_processor_sharing():
+    env = simpy.Environment()
+    link = Uplink(env)
+    done = []
+    link.send_many([1.0, 1.0], lambda a: done.append((a, round(env.now, 9))), ['a', 'b'])
+
+    def late():
+        yield env.timeout(0.5)
+        link.send(0.25, lambda a: done.append((a, round(env.now, 9))), 'c')
+
+    env.process(late())
+    run(env)
+    assert done == [('c', 1.25), ('a', 2.25), ('b', 2.25)]
+    assert link.peak == 3
+
+
+def test_no_livelock_at_large_time():
+    # Finish tags a few ulps apart: the remaining work is below the resolution of env.now
+    env = simpy.Environment(initial_time=1.35e6)
+    link = Uplink(env)
+    done = []
+    link.send_many([1e-3 + i * 4e-12 for i in range(18)], done.append, list(range(18)))
+    steps = run(env)
+    assert sorted(done) == list(range(18))
+    assert steps < 100